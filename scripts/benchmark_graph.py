@@ -0,0 +1,108 @@
+# benchmark_graph.py
+"""
+그래프 구성(topology)별 전체 응답 지연 시간과 라우팅 결과를 비교합니다.
+답변 캐시는 측정을 왜곡하므로 끈 상태로 실행합니다.
+--stream 옵션을 주면 스트리밍으로 실행하여 첫 토큰까지 시간(TTFT)도 함께 보고합니다.
+--speculative 옵션을 주면 추측 검색을 켜고 구성별 사용/낭비 건수와 낭비된 검색 시간을 함께 보고합니다.
+
+실행 (프로젝트 루트에서):
+    python scripts/benchmark_graph.py --topologies three_node fused --repeat 2 --stream
+    python scripts/benchmark_graph.py --topologies three_node --speculative
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "src")]
+os.environ["ANSWER_CACHE"] = "0"
+os.environ["SEMANTIC_CACHE"] = "0"
+
+from graph import build_graph  # noqa: E402
+from streaming import stream_answer  # noqa: E402
+from speculation import get_speculation_stats  # noqa: E402
+
+SAMPLE_QUESTIONS = [
+    "연차 며칠 쓸 수 있어?",
+    "복지 point 얼마지?",
+    "병가 쓰려면 어떻게 해?",
+    "VPN 접속이 안 돼요",
+    "퇴직금 언제 들어와요?",
+    "이번 분기 회사 매출 알려줘",
+    "출장비 정산은 누구한테 물어봐?",
+    "나 반          차 쓸 수 있어?",
+]
+
+def _route(result: Dict) -> str:
+    if result.get("answer_type") == "department_contact":
+        return f"department:{(result.get('department_info') or {}).get('name', '')}"
+    return result.get("answer_type", "")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="그래프 구성별 지연 시간 벤치마크")
+    parser.add_argument("--topologies", nargs="+", default=["three_node", "fused"])
+    parser.add_argument("--repeat", type=int, default=1, help="질문별 반복 횟수")
+    parser.add_argument("--questions", nargs="+", default=SAMPLE_QUESTIONS)
+    parser.add_argument("--stream", action="store_true", help="스트리밍 실행 후 TTFT 측정")
+    parser.add_argument("--speculative", action="store_true", help="라우터와 병렬로 추측 검색 (fused 구성에는 적용 안 됨)")
+    args = parser.parse_args()
+
+    latencies: Dict[str, List[float]] = {}
+    ttfts: Dict[str, List[float]] = {}
+    routes: Dict[str, List[str]] = {}
+    speculation: Dict[str, Dict[str, float]] = {}
+    for topology in args.topologies:
+        graph = build_graph(topology=topology, speculative=args.speculative or None)  # 옵션이 없으면 GRAPH_SPECULATIVE 사용
+        before = get_speculation_stats()
+        latencies[topology], ttfts[topology], routes[topology] = [], [], []
+        for question in args.questions:
+            for _ in range(args.repeat):
+                if args.stream:
+                    result = {}
+                    for event in stream_answer(graph, question):
+                        if event["event"] == "answer":
+                            result = {"answer_type": event["answer_type"], "department_info": event["department_info"]}
+                        elif event["event"] == "metrics":
+                            latencies[topology].append(event["total"])
+                            if event["ttft"] is not None:
+                                ttfts[topology].append(event["ttft"])
+                    continue
+                start = time.perf_counter()
+                result = graph.invoke({"messages": [{"role": "user", "content": question}]})
+                latencies[topology].append(time.perf_counter() - start)
+            routes[topology].append(_route(result))
+        after = get_speculation_stats()
+        speculation[topology] = {k: after[k] - before[k] for k in ("used", "wasted", "failed", "wasted_seconds")}
+
+    base = args.topologies[0]
+    header = f"\n{'topology':<12}{'p50(s)':>9}{'mean(s)':>9}{'max(s)':>9}{'route_agree':>13}"
+    print(header + (f"{'ttft_p50(s)':>13}" if args.stream else ""))
+    for topology in args.topologies:
+        values = latencies[topology]
+        agree = statistics.mean(a == b for a, b in zip(routes[topology], routes[base]))
+        line = (f"{topology:<12}{statistics.median(values):>9.2f}{statistics.mean(values):>9.2f}"
+                f"{max(values):>9.2f}{agree:>13.2f}")
+        if args.stream:
+            line += f"{statistics.median(ttfts[topology]):>13.2f}" if ttfts[topology] else f"{'-':>13}"
+        print(line)
+
+    if args.speculative:
+        # 버려진 검색의 소요 시간은 검색이 끝날 때 기록되므로 직후에는 일부 누락될 수 있음
+        print(f"\n{'topology':<12}{'spec_used':>11}{'spec_wasted':>13}{'spec_failed':>13}{'wasted(s)':>11}")
+        for topology in args.topologies:
+            stats = speculation[topology]
+            print(f"{topology:<12}{stats['used']:>11.0f}{stats['wasted']:>13.0f}{stats['failed']:>13.0f}"
+                  f"{stats['wasted_seconds']:>11.2f}")
+
+    print("\n질문별 라우팅:")
+    for i, question in enumerate(args.questions):
+        print(f"- {question}: " + ", ".join(f"{t}={routes[t][i]}" for t in args.topologies))
+
+
+if __name__ == "__main__":
+    main()
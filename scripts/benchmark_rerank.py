@@ -0,0 +1,81 @@
+# benchmark_rerank.py
+"""
+재순위화 백엔드별 지연 시간과 LLM 재순위화 결과와의 일치도를 측정합니다.
+
+실행 (프로젝트 루트에서):
+    python scripts/benchmark_rerank.py --k 5 --top 3 --backends llm_batch lexical
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "src")]
+
+from rerankers import RERANKERS, order_by_scores  # noqa: E402
+from scripts.create_pinecone_index import get_vectorstore  # noqa: E402
+
+SAMPLE_QUESTIONS = [
+    "연차 휴가 안내",
+    "복지 포인트 안내",
+    "병가 사용 기준",
+    "경조사 휴가 일수",
+    "건강검진 지원",
+    "사내 동호회 지원",
+    "자기계발비 지원 한도",
+    "육아휴직 제도",
+]
+
+
+def _top_ids(docs, scores: List[Optional[float]], top: int) -> List[int]:
+    # 채점되지 않은(None) 후보는 그래프와 같이 벡터 유사도 순위 자리를 유지
+    return order_by_scores(list(range(len(docs))), scores)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="재순위화 백엔드 벤치마크")
+    parser.add_argument("--k", type=int, default=5, help="검색 후보 문서 수")
+    parser.add_argument("--top", type=int, default=3, help="비교할 상위 문서 수")
+    parser.add_argument("--reference", default="llm_per_doc", help="기준이 되는 LLM 백엔드")
+    parser.add_argument("--backends", nargs="+", default=list(RERANKERS), help="측정할 백엔드 목록")
+    parser.add_argument("--questions", nargs="+", default=SAMPLE_QUESTIONS)
+    args = parser.parse_args()
+
+    retriever = get_vectorstore().as_retriever(search_kwargs={"k": args.k})
+    backends = [args.reference] + [b for b in args.backends if b != args.reference]
+
+    latencies: Dict[str, List[float]] = {b: [] for b in backends}
+    overlaps: Dict[str, List[float]] = {b: [] for b in backends}
+
+    for question in args.questions:
+        docs = retriever.invoke(question)
+        if not docs:
+            print(f"[건너뜀] 검색 결과 없음: {question}")
+            continue
+        top = min(args.top, len(docs))
+        reference_ids: List[int] = []
+        for name in backends:
+            start = time.perf_counter()
+            scores = RERANKERS[name](question, docs)
+            latencies[name].append(time.perf_counter() - start)
+            ids = _top_ids(docs, scores, top)
+            if name == args.reference:
+                reference_ids = ids
+            overlaps[name].append(len(set(ids) & set(reference_ids)) / top)
+
+    print(f"\n{'backend':<14}{'p50(ms)':>10}{'max(ms)':>10}{'overlap@' + str(args.top):>14}")
+    for name in backends:
+        if not latencies[name]:
+            continue
+        p50 = statistics.median(latencies[name]) * 1000
+        worst = max(latencies[name]) * 1000
+        overlap = statistics.mean(overlaps[name])
+        print(f"{name:<14}{p50:>10.1f}{worst:>10.1f}{overlap:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,85 @@
 # db.py
 
 from dotenv import load_dotenv
+import argparse
 import os
+import json
 import logging
+import re
+import shutil
 import threading
 import time
-from typing import List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Set, Tuple
+
+import openai
+import xxhash
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
 
 from pinecone import Pinecone, ServerlessSpec
 from langchain_openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
 from langchain_pinecone import PineconeVectorStore
-from langchain_core.vectorstores import VectorStoreRetriever
+from langchain_core.vectorstores import VectorStore, VectorStoreRetriever
 from langchain_core.documents import Document
 
+try:
+    from scripts.local_vectorstore import LocalVectorStore
+    from scripts.embedding_cache import CachedEmbeddings, embedding_cache_enabled, embedding_cache_path
+except ImportError:  # scripts/ 에서 직접 실행하는 경우
+    from local_vectorstore import LocalVectorStore
+    from embedding_cache import CachedEmbeddings, embedding_cache_enabled, embedding_cache_path
+
 # --- 초기 설정 ---
 load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-DOCS_DIRECTORY = os.path.join("..", "data")  # scripts/에서 data/로 접근하는 상대 경로
-HR_DOCUMENT_FILES = [
-    "04_복지정책_v1.0.md"
-]
-# HR_DOCUMENT_FILES = [                 # 문서 추가 후, 변경
-#     "01_직원핸드북_v1.0_2025-01-10.md",
-#     "02_근무정책_v1.0.md",
-#     "03_휴가정책_v1.0.md",
-#     "04_복지정책_v1.0.md",
-#     "05_장비·보안정책_v1.0.md",
-# ]
-
-EXISTING_HR_DOCS = [
-    os.path.join(DOCS_DIRECTORY, f) for f in HR_DOCUMENT_FILES 
-    if os.path.exists(os.path.join(DOCS_DIRECTORY, f))
-]
+# 실행 위치(CWD)와 관계없이 이 파일 기준으로 data/, .cache/ 경로를 계산
+# (그래프 서버는 프로젝트 루트, 인덱싱/감시 스크립트는 scripts/에서 실행해도 같은 상태 파일을 공유)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOCS_DIRECTORY = os.getenv("DOCS_DIRECTORY", os.path.join(PROJECT_ROOT, "data"))
+
+
+def list_hr_docs(directory: Optional[str] = None) -> List[str]:
+    """data/ 아래의 모든 마크다운 문서 (파일을 추가하면 별도 목록 수정 없이 수집 대상이 됩니다)"""
+    directory = directory or DOCS_DIRECTORY
+    try:
+        names = sorted(f for f in os.listdir(directory) if f.endswith(".md") and not f.startswith("."))
+    except OSError:
+        return []
+    return [os.path.join(directory, f) for f in names if os.path.isfile(os.path.join(directory, f))]
+
+
+# 벡터 저장소 백엔드: "pinecone"(기본) | "local"(NumPy 전수 검색, 네트워크 호출 없음)
+VECTORSTORE_BACKEND = os.getenv("VECTORSTORE_BACKEND", "pinecone")
+LOCAL_VECTORSTORE_DIR = os.getenv("LOCAL_VECTORSTORE_DIR", os.path.join(PROJECT_ROOT, ".cache", "vectorstore"))
+# 동기화 매니페스트 등 인덱스 상태 파일 저장 위치
+INDEX_STATE_DIR = os.getenv("INDEX_STATE_DIR", os.path.join(PROJECT_ROOT, ".cache", "index_state"))
 
 # --- 전역 변수 및 캐시 ---
-_VSTORE_CACHE: Dict[str, PineconeVectorStore] = {}
+_VSTORE_CACHE: Dict[str, VectorStore] = {}
 _VSTORE_LOCK = threading.Lock()
+_EMBEDDINGS: Dict[str, Embeddings] = {}
+
+# 문서가 다시 업로드될 때 호출할 캐시 무효화 콜백 (답변 캐시 등)
+_INVALIDATION_HOOKS: List[Callable[[], None]] = []
+
+
+def register_invalidation_hook(hook: Callable[[], None]) -> None:
+    """인덱스 문서가 변경될 때 호출될 콜백을 등록합니다."""
+    if hook not in _INVALIDATION_HOOKS:
+        _INVALIDATION_HOOKS.append(hook)
+
+
+def _run_invalidation_hooks() -> None:
+    """등록된 모든 캐시 무효화 콜백을 실행합니다."""
+    for hook in list(_INVALIDATION_HOOKS):
+        try:
+            hook()
+        except Exception as e:
+            logging.warning(f"캐시 무효화 콜백 실행 중 오류 발생: {e}")
 
 
 # --- Pinecone 클라이언트 관리 ---
@@ -92,10 +133,79 @@ def _ensure_index(pc: Pinecone, name: str, dimension: int):
         logging.error(f"'{name}' 인덱스 생성 실패: {e}")
         raise
 
+# --- 임베딩 모델 ---
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+def get_embeddings(model: str = EMBEDDING_MODEL) -> Embeddings:
+    """
+    모델별 임베딩 인스턴스를 한 번만 생성하여 재사용합니다.
+    EMBEDDING_CACHE=1(기본)이면 내용 해시 기반 디스크 캐시(EMBEDDING_CACHE_PATH)를 먼저 조회합니다.
+    """
+    with _VSTORE_LOCK:
+        if model not in _EMBEDDINGS:
+            embeddings: Embeddings = OpenAIEmbeddings(model=model)
+            if embedding_cache_enabled():
+                embeddings = CachedEmbeddings(embeddings, model, embedding_cache_path())
+            _EMBEDDINGS[model] = embeddings
+        return _EMBEDDINGS[model]
+
+
+def get_ingest_embeddings(model: str = EMBEDDING_MODEL) -> Embeddings:
+    """
+    수집 파이프라인용 임베딩 인스턴스 (클라이언트 내부 재시도 없음)
+    재시도는 _with_backoff(tenacity) 한 곳에서만 하므로, 429 한 번이 재시도 횟수의 제곱만큼 호출되지 않습니다.
+    """
+    key = f"{model} (ingest)"
+    with _VSTORE_LOCK:
+        if key not in _EMBEDDINGS:
+            embeddings: Embeddings = OpenAIEmbeddings(model=model, max_retries=0)
+            if embedding_cache_enabled():
+                embeddings = CachedEmbeddings(embeddings, model, embedding_cache_path())
+            _EMBEDDINGS[key] = embeddings
+        return _EMBEDDINGS[key]
+
+
+def get_embedding_cache_stats() -> Dict[str, Dict[str, float]]:
+    """모델별 임베딩 캐시 적중률, 저장 용량(bytes), 절약한 API 호출 수"""
+    with _VSTORE_LOCK:
+        cached = {m: e for m, e in _EMBEDDINGS.items() if isinstance(e, CachedEmbeddings)}
+    return {model: e.stats() for model, e in cached.items()}
+
+
 # --- 문서 처리 ---
-def _load_and_split_docs(file_paths: List[str]) -> List[Document]:
-    """여러 마크다운 파일을 로드하고 구조적으로 분할하여 문서 청크 리스트를 반환합니다."""
-    all_splits = []
+HEADER_KEYS = ("doc_title", "main_category", "sub_category")
+
+
+def _hash(text: str, length: int = 16) -> str:
+    return xxhash.xxh3_64_hexdigest(text.encode("utf-8"))[:length]
+
+
+def chunk_header_path(doc: Document) -> str:
+    """청크의 헤더 경로 (예: "복지제도 안내서 > 1. 휴가 및 휴직 제도 > 1.1 연차휴가")"""
+    return " > ".join(doc.metadata[k] for k in HEADER_KEYS if doc.metadata.get(k))
+
+
+def _assign_chunk_ids(splits: List[Document]) -> None:
+    """
+    출처 파일 + 헤더 경로 + 내용 해시로 안정적인 청크 id를 부여합니다.
+    - 내용이 같으면 재실행해도 같은 id -> 변경된 청크만 업서트/삭제 가능
+    - 출처 해시를 접두사로 두어 파일 단위 조회(prefix)가 가능
+    - Pinecone id는 ASCII만 허용하므로 한글 파일명/헤더는 해시로 변환
+    """
+    seen: Dict[str, int] = {}
+    for doc in splits:
+        base = "#".join([
+            _hash(doc.metadata.get("source", ""), 8),
+            _hash(chunk_header_path(doc), 8),
+            _hash(doc.page_content),
+        ])
+        # 같은 헤더 아래 동일한 내용이 반복되는 경우 순번으로 구분
+        seen[base] = seen.get(base, 0) + 1
+        doc.id = base if seen[base] == 1 else f"{base}#{seen[base]}"
+
+
+def _text_splitters() -> Tuple[MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter]:
     headers_to_split_on = [
         ("#", "doc_title"),
         ("##", "main_category"),
@@ -109,74 +219,593 @@ def _load_and_split_docs(file_paths: List[str]) -> List[Document]:
         chunk_overlap=200,
         separators=["\n\n", "\n", ". ", "? ", "! ", " ", ""]
     )
+    return markdown_splitter, text_splitter
 
-    for file_path in file_paths:
-        try:
-            loader = TextLoader(file_path, encoding="utf-8")
-            documents = loader.load()
-            if not documents:
-                logging.warning(f"'{file_path}' 파일이 비어있습니다.")
-                continue
-            
-            md_splits = markdown_splitter.split_text(documents[0].page_content)
-            
-            # 각 분할된 문서에 파일 출처(source) 메타데이터 추가
-            for doc in md_splits:
-                doc.metadata["source"] = os.path.basename(file_path)
-
-            splits = text_splitter.split_documents(md_splits)
-            all_splits.extend(splits)
-            logging.info(f"'{file_path}' 로드 및 분할 완료: {len(splits)}개 청크 생성.")
-        except Exception as e:
-            logging.error(f"'{file_path}' 처리 중 오류 발생: {e}")
-            
+
+def _load_and_split_file(file_path: str) -> List[Document]:
+    """마크다운 파일 하나를 로드하고 구조적으로 분할합니다."""
+    markdown_splitter, text_splitter = _text_splitters()
+    try:
+        loader = TextLoader(file_path, encoding="utf-8")
+        documents = loader.load()
+        if not documents:
+            logging.warning(f"'{file_path}' 파일이 비어있습니다.")
+            return []
+
+        md_splits = markdown_splitter.split_text(documents[0].page_content)
+
+        # 각 분할된 문서에 파일 출처(source) 메타데이터 추가
+        for doc in md_splits:
+            doc.metadata["source"] = os.path.basename(file_path)
+
+        splits = text_splitter.split_documents(md_splits)
+        _assign_chunk_ids(splits)
+        logging.info(f"'{file_path}' 로드 및 분할 완료: {len(splits)}개 청크 생성.")
+        return splits
+    except Exception as e:
+        logging.error(f"'{file_path}' 처리 중 오류 발생: {e}")
+        return []
+
+
+def _load_and_split_docs(file_paths: List[str], stats: Optional["IngestStats"] = None) -> List[Document]:
+    """여러 마크다운 파일을 병렬로 로드·분할하여 문서 청크 리스트를 반환합니다. (파일 순서 유지)"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=_ingest_workers(), thread_name_prefix="ingest-read") as pool:
+        all_splits = [doc for splits in pool.map(_load_and_split_file, file_paths) for doc in splits]
+    if stats is not None:
+        stats.record("read_split", len(all_splits), started, time.perf_counter())
     return all_splits
 
-# --- VectorStore ---
-def get_vectorstore(
-    index_name: str = "gaida-hr-rules",
-    recreate: bool = False,
-) -> PineconeVectorStore:
+
+def load_chunks(file_paths: Optional[List[str]] = None) -> List[Document]:
+    """인덱스에 올라가는 것과 같은 청크(같은 id)를 로컬 문서에서 만듭니다. (BM25 등 로컬 검색용)"""
+    return _load_and_split_docs(list_hr_docs() if file_paths is None else file_paths)
+
+
+# --- 병렬 수집 파이프라인 ---
+# 읽기·분할은 파일 단위, 임베딩·업서트는 배치 단위로 워커 풀에서 실행합니다.
+# 각 배치는 임베딩 직후 바로 업서트되므로 배치 간에 두 단계가 겹쳐 진행됩니다.
+# INGEST_WORKERS: 동시 작업 수 (기본 4), INGEST_BATCH_SIZE: 임베딩/업서트 배치 크기 (기본 100)
+# INGEST_MAX_RETRIES: 레이트 리밋(429)·일시 오류 시 지수 백오프 재시도 횟수 (기본 6)
+def _ingest_workers() -> int:
+    return max(1, int(os.getenv("INGEST_WORKERS", "4")))
+
+
+class IngestStats:
+    """단계별 처리 청크 수와 처리량(chunks/s)을 집계합니다."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+
+    def record(self, stage: str, chunks: int, started: float, ended: float) -> None:
+        with self._lock:
+            s = self._stages.setdefault(stage, {"chunks": 0, "busy": 0.0, "first": started, "last": ended})
+            s["chunks"] += chunks
+            s["busy"] += ended - started
+            s["first"] = min(s["first"], started)
+            s["last"] = max(s["last"], ended)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """단계별 {chunks, seconds(벽시계), busy_seconds(작업 합계), chunks_per_sec}"""
+        with self._lock:
+            report = {}
+            for stage, s in self._stages.items():
+                wall = s["last"] - s["first"]
+                report[stage] = {
+                    "chunks": s["chunks"],
+                    "seconds": round(wall, 3),
+                    "busy_seconds": round(s["busy"], 3),
+                    "chunks_per_sec": round(s["chunks"] / wall, 1) if wall > 0 else 0.0,
+                }
+            return report
+
+
+def _is_retryable(e: BaseException) -> bool:
+    """레이트 리밋(429) 및 일시적인 연결/서버 오류 여부 (예외 타입과 상태 코드로만 판단)"""
+    if isinstance(e, (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)):
+        return True
+    status = getattr(e, "status_code", None) or getattr(e, "status", None)  # openai: status_code, Pinecone: status
+    return status in (429, 500, 502, 503, 504)
+
+
+def _with_backoff(fn: Callable, *args):
+    retrying = Retrying(
+        retry=retry_if_exception(_is_retryable),
+        wait=wait_random_exponential(multiplier=1, max=30),
+        stop=stop_after_attempt(int(os.getenv("INGEST_MAX_RETRIES", "6"))),
+        before_sleep=lambda rs: logging.warning(
+            f"수집 작업 재시도 ({rs.attempt_number}회 실패, {rs.next_action.sleep:.1f}초 대기): {rs.outcome.exception()}"
+        ),
+        reraise=True,
+    )
+    return retrying(fn, *args)
+
+
+def _upsert_embeddings(vectorstore: VectorStore, docs: List[Document], vectors: List[List[float]]) -> None:
+    """미리 계산한 임베딩을 청크 id로 업서트합니다."""
+    if isinstance(vectorstore, LocalVectorStore):
+        vectorstore.add_embeddings(
+            [d.page_content for d in docs], vectors, [dict(d.metadata) for d in docs], ids=[d.id for d in docs]
+        )
+        return
+    # PineconeVectorStore.add_texts와 같은 형식 (본문은 text_key 메타데이터에 저장)
+    text_key = vectorstore._text_key
+    vectorstore.index.upsert(
+        vectors=[(d.id, v, {**d.metadata, text_key: d.page_content}) for d, v in zip(docs, vectors)],
+        namespace=vectorstore._namespace,
+    )
+
+
+def _ingest_chunks(vectorstore: VectorStore, docs: List[Document], stats: IngestStats) -> None:
+    """청크를 배치로 나누어 임베딩 -> 업서트를 워커 풀에서 병렬 실행합니다."""
+    batch_size = max(1, int(os.getenv("INGEST_BATCH_SIZE", "100")))
+    batches = [docs[i:i + batch_size] for i in range(0, len(docs), batch_size)]
+    embeddings = get_ingest_embeddings()
+
+    def _run(batch: List[Document]) -> None:
+        started = time.perf_counter()
+        vectors = _with_backoff(embeddings.embed_documents, [d.page_content for d in batch])
+        embedded = time.perf_counter()
+        stats.record("embed", len(batch), started, embedded)
+        _with_backoff(_upsert_embeddings, vectorstore, batch, vectors)
+        stats.record("upsert", len(batch), embedded, time.perf_counter())
+
+    with ThreadPoolExecutor(max_workers=_ingest_workers(), thread_name_prefix="ingest") as pool:
+        list(pool.map(_run, batches))  # 배치 하나라도 실패하면 예외 전파
+
+
+# --- 증분 동기화 ---
+def _manifest_path(index_name: str) -> str:
+    return os.path.join(INDEX_STATE_DIR, f"{index_name}.manifest.json")
+
+
+def load_manifest(index_name: str) -> Optional[Dict]:
+    """마지막 동기화 매니페스트 (없으면 None)"""
+    try:
+        with open(_manifest_path(index_name), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(index_name: str, manifest: Dict) -> None:
+    os.makedirs(INDEX_STATE_DIR, exist_ok=True)
+    path = _manifest_path(index_name)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _existing_ids(vectorstore: VectorStore, index_name: str) -> Set[str]:
+    """인덱스에 이미 있는 청크 id (조회 불가 시 마지막 매니페스트 기준)"""
+    try:
+        if isinstance(vectorstore, LocalVectorStore):
+            return set(vectorstore.ids)
+        if isinstance(vectorstore, PineconeVectorStore):
+            ids: Set[str] = set()
+            for page in vectorstore.index.list(namespace=vectorstore._namespace):  # serverless 인덱스만 지원
+                ids.update(page)
+            return ids
+    except Exception as e:
+        logging.warning(f"인덱스 '{index_name}'의 id 목록 조회 실패, 매니페스트 기준으로 비교합니다: {e}")
+    manifest = load_manifest(index_name) or {}
+    return set(manifest.get("chunks", {}))
+
+
+def sync_documents(
+    vectorstore: VectorStore,
+    index_name: str,
+    split_docs: List[Document],
+    existing: Optional[Set[str]] = None,
+    namespace: str = "",
+    stats: Optional[IngestStats] = None,
+    sources: Optional[List[str]] = None,
+    write_manifest: bool = True,
+) -> Dict:
     """
-    Pinecone 벡터 저장소를 가져오거나 생성합니다.
-    - 캐시된 인스턴스가 있으면 반환합니다.
-    - recreate=True이면, 인덱스 내 문서를 모두 삭제하고 새로 업로드합니다.
-    - DB가 비어있으면 자동으로 문서를 업로드합니다.
+    청크 id 기준으로 인덱스와 문서를 비교하여 변경분만 반영하고 매니페스트를 기록합니다.
+    새 청크를 먼저 업서트한 뒤 사라진 청크를 삭제하므로 동기화 중에도 검색 결과가 비지 않습니다.
+    existing: 이미 있는 청크 id (None이면 인덱스에서 조회, 새 네임스페이스는 빈 집합)
+    sources: 주어지면 해당 출처 파일의 청크만 비교 (나머지 파일의 청크는 그대로 유지)
+    write_manifest: False이면 매니페스트를 기록하지 않고 반환만 함 (블루/그린 전환 후 기록)
+    """
+    start = time.perf_counter()
+    stats = stats or IngestStats()
+    desired = {doc.id: doc for doc in split_docs}
+    if existing is None:
+        existing = _existing_ids(vectorstore, index_name)
+    if sources is not None:
+        prefixes = {_hash(source, 8) + "#" for source in sources}
+        existing = {doc_id for doc_id in existing if doc_id[:9] in prefixes}
+
+    added = [doc_id for doc_id in desired if doc_id not in existing]
+    removed = sorted(existing - desired.keys())
+
+    if added:
+        logging.info(f"인덱스 '{index_name}'에 {len(added)}개 청크를 업서트합니다.")
+        _ingest_chunks(vectorstore, [desired[i] for i in added], stats)
+    if removed:
+        logging.info(f"인덱스 '{index_name}'에서 {len(removed)}개 청크를 삭제합니다.")
+        vectorstore.delete(ids=removed)
+
+    manifest = {
+        "index_name": index_name,
+        "namespace": namespace,
+        "synced_at": time.time(),
+        "elapsed": round(time.perf_counter() - start, 3),
+        "added": added,
+        "removed": removed,
+        "unchanged": len(desired) - len(added),
+        "throughput": stats.report(),
+        "chunks": {
+            doc_id: {
+                "source": doc.metadata.get("source", ""),
+                "header_path": chunk_header_path(doc),
+                "content_hash": doc_id.split("#")[2],
+            }
+            for doc_id, doc in desired.items()
+        },
+    }
+    if sources is not None:
+        # 부분 동기화: 나머지 출처의 청크 기록은 이전 매니페스트에서 유지
+        previous = (load_manifest(index_name) or {}).get("chunks", {})
+        kept = {k: v for k, v in previous.items() if v.get("source") not in set(sources)}
+        manifest["chunks"] = {**kept, **manifest["chunks"]}
+        manifest["sources"] = sorted(sources)
+    if write_manifest:
+        _write_manifest(index_name, manifest)
+    logging.info(
+        f"인덱스 '{index_name}' 동기화 완료: 추가 {len(added)}, 삭제 {len(removed)}, 유지 {manifest['unchanged']}"
+    )
+    for stage, stage_stats in manifest["throughput"].items():
+        logging.info(f"  - {stage}: {stage_stats['chunks']}개 청크, {stage_stats['chunks_per_sec']} chunks/s")
+    return manifest
+
+
+# --- 인덱스 디스크립터 (블루/그린 별칭) ---
+# 인덱스별로 현재 서비스 중인 네임스페이스(live)와 폐기 예정 네임스페이스(retired)를 기록합니다.
+# 프로세스 안에서는 _VSTORE_CACHE[index_name]이 live 네임스페이스를 가리키는 별칭 역할을 합니다.
+def _descriptor_path(index_name: str) -> str:
+    return os.path.join(INDEX_STATE_DIR, f"{index_name}.descriptor.json")
+
+
+def load_descriptor(index_name: str) -> Dict:
+    try:
+        with open(_descriptor_path(index_name), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_descriptor(index_name: str, descriptor: Dict) -> None:
+    os.makedirs(INDEX_STATE_DIR, exist_ok=True)
+    path = _descriptor_path(index_name)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(descriptor, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)  # 원자적 교체: 읽는 쪽은 이전 또는 새 디스크립터만 봅니다.
+
+
+# --- 코퍼스 버전 (다른 프로세스의 캐시 무효화) ---
+# 수집 프로세스(스크립트, watch_data.py)는 문서가 바뀔 때마다 디스크립터의 corpus_version을 올립니다.
+# 그래프 프로세스는 get_vectorstore 호출 시 CORPUS_CHECK_INTERVAL(기본 2초)마다 디스크립터를 확인하고,
+# 버전이 바뀌었으면 VectorStore 별칭을 다시 연결하고 무효화 콜백(답변 캐시 등)을 실행합니다.
+_SEEN_CORPUS_VERSION: Dict[str, int] = {}
+_LAST_CORPUS_CHECK: Dict[str, float] = {}
+
+
+def _publish_change(index_name: str, descriptor: Optional[Dict] = None) -> int:
+    """
+    디스크립터의 corpus_version을 올려 기록하고, 이 프로세스의 캐시를 무효화합니다.
+    descriptor를 넘기면 vector_count는 호출한 쪽이 채운 값을 사용합니다. (없으면 매니페스트 기준)
     """
+    if descriptor is None:
+        descriptor = load_descriptor(index_name)
+        chunk_count = len((load_manifest(index_name) or {}).get("chunks", {}))
+        if chunk_count:
+            descriptor["vector_count"] = chunk_count
+    version = int(descriptor.get("corpus_version", 0)) + 1
+    descriptor.update({"corpus_version": version, "updated_at": time.time()})
+    _write_descriptor(index_name, descriptor)
     with _VSTORE_LOCK:
-        if not recreate and index_name in _VSTORE_CACHE:
-            logging.info(f"캐시된 VectorStore 인스턴스 '{index_name}'를 반환합니다.")
-            return _VSTORE_CACHE[index_name]
+        _SEEN_CORPUS_VERSION[index_name] = version
+    _run_invalidation_hooks()
+    return version
+
+
+def check_corpus_version(index_name: str) -> None:
+    """
+    다른 프로세스가 코퍼스를 갱신했으면 캐시된 별칭을 버리고 무효화 콜백을 실행합니다.
+    CORPUS_CHECK_INTERVAL 안에서는 시각 비교만 하므로 검색 경로에서 매번 호출해도 됩니다.
     """
+    now = time.monotonic()
+    interval = float(os.getenv("CORPUS_CHECK_INTERVAL", "2"))
+    if now - _LAST_CORPUS_CHECK.get(index_name, float("-inf")) < interval:
+        return
+    _LAST_CORPUS_CHECK[index_name] = now
+    version = int(load_descriptor(index_name).get("corpus_version", 0))
+    with _VSTORE_LOCK:
+        seen = _SEEN_CORPUS_VERSION.setdefault(index_name, version)
+        if version == seen:
+            return
+        _SEEN_CORPUS_VERSION[index_name] = version
+        _VSTORE_CACHE.pop(index_name, None)
+    logging.info(f"인덱스 '{index_name}'의 코퍼스 버전 변경 감지 ({seen} -> {version}): 캐시를 무효화합니다.")
+    _run_invalidation_hooks()
+
+
+# --- VectorStore ---
+def _can_fast_attach(descriptor: Optional[Dict], dimension: int) -> bool:
+    """디스크립터에 기록된 인덱스 정보가 현재 설정과 맞으면 검증 없이 바로 연결"""
+    return (
+        bool(descriptor)
+        and os.getenv("INDEX_FAST_ATTACH", "1") == "1"
+        and bool(descriptor.get("host"))
+        and descriptor.get("dimension") == dimension
+        and descriptor.get("embedding_model") == EMBEDDING_MODEL
+        and int(descriptor.get("vector_count", 0)) > 0
+    )
+
+
+def _record_index_info(index_name: str, host: str, dimension: int, vector_count: int) -> None:
+    """전체 검증으로 확인한 인덱스 정보를 디스크립터에 기록 (다음 프로세스는 fast-attach)"""
+    descriptor = load_descriptor(index_name)
+    descriptor.update({
+        "backend": VECTORSTORE_BACKEND,
+        "index_name": index_name,
+        "host": host,
+        "dimension": dimension,
+        "embedding_model": EMBEDDING_MODEL,
+        "vector_count": vector_count,
+        "verified_at": time.time(),
+    })
+    _write_descriptor(index_name, descriptor)
+
+
+def _open_vectorstore(
+    index_name: str, namespace: str = "", descriptor: Optional[Dict] = None
+) -> Tuple[VectorStore, int]:
+    """
+    백엔드별 벡터 저장소와 (해당 네임스페이스의) 벡터 수를 반환합니다.
+    descriptor가 주어지고 fast-attach 조건을 만족하면 list_indexes / describe_index_stats 없이
+    기록된 host로 바로 연결하고 기록된 벡터 수를 사용합니다. (INDEX_FAST_ATTACH=1, 기본값)
+    그 외에는 인덱스 존재 확인(필요 시 생성 대기)과 통계 조회로 전체 검증 후 디스크립터를 갱신합니다.
+
     임베딩 모델별 dimension
     OpenAI text-embedding-ada-002: 1536
     OpenAI text-embedding-3-small: 1536
     OpenAI text-embedding-3-large: 3072
     """
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+    embeddings = get_embeddings()
     dimension = 1536
 
+    if VECTORSTORE_BACKEND == "local":
+        # 인덱스 이름(/네임스페이스)별 디렉터리에 벡터 행렬(.npy)과 문서(.jsonl)를 저장
+        path = os.path.join(LOCAL_VECTORSTORE_DIR, index_name, namespace) if namespace else os.path.join(LOCAL_VECTORSTORE_DIR, index_name)
+        vectorstore = LocalVectorStore(embeddings, path)
+        return vectorstore, len(vectorstore)
+
     pc = _get_pinecone_client()
+    if _can_fast_attach(descriptor, dimension):
+        index = pc.Index(host=descriptor["host"])
+        vectorstore = PineconeVectorStore(index=index, embedding=embeddings, namespace=namespace or None)
+        logging.info(f"디스크립터로 인덱스 '{index_name}'에 바로 연결합니다. (corpus_version {descriptor.get('corpus_version', 0)})")
+        return vectorstore, int(descriptor["vector_count"])
+
     _ensure_index(pc, index_name, dimension)
-    index = pc.Index(index_name)
+    host = pc.describe_index(index_name).host
+    index = pc.Index(host=host)
+
+    vectorstore = PineconeVectorStore(index=index, embedding=embeddings, namespace=namespace or None)
+    vector_count = _vector_count(vectorstore)
+    if vector_count > 0:
+        _record_index_info(index_name, host, dimension, vector_count)
+    return vectorstore, vector_count
+
+
+def _vector_count(vectorstore: VectorStore) -> int:
+    if isinstance(vectorstore, LocalVectorStore):
+        return len(vectorstore)
+    stats = vectorstore.index.describe_index_stats()
+    namespace = vectorstore._namespace
+    if not namespace:
+        return stats.get("total_vector_count", 0)
+    return (stats.get("namespaces", {}).get(namespace) or {}).get("vector_count", 0)
+
+
+def _verify_namespace(vectorstore: VectorStore, expected: int, probe: str, timeout: float = 60.0) -> bool:
+    """새 네임스페이스가 모두 채워졌는지(벡터 수) 확인하고, 검색이 결과를 반환하는지 점검합니다."""
+    deadline = time.monotonic() + timeout
+    count = _vector_count(vectorstore)
+    while count < expected and time.monotonic() < deadline:  # Pinecone 통계는 업서트 직후 늦게 반영될 수 있음
+        time.sleep(2)
+        count = _vector_count(vectorstore)
+    if count < expected:
+        logging.error(f"새 네임스페이스 벡터 수 부족: {count}/{expected}")
+        return False
+    if not vectorstore.similarity_search(probe, k=1):
+        logging.error(f"새 네임스페이스 검색 점검 실패: '{probe}'")
+        return False
+    return True
 
-    vectorstore = PineconeVectorStore(index=index, embedding=embeddings)
 
-    stats = index.describe_index_stats()
-    vector_count = stats.get("total_vector_count", 0)
+def _drop_namespace(index_name: str, namespace: str) -> None:
+    if VECTORSTORE_BACKEND == "local" and namespace:
+        shutil.rmtree(os.path.join(LOCAL_VECTORSTORE_DIR, index_name, namespace), ignore_errors=True)
+    elif VECTORSTORE_BACKEND == "local":
+        # 기본 네임스페이스는 인덱스 디렉터리 바로 아래 파일이므로 하위 버전 디렉터리는 남김
+        LocalVectorStore(get_embeddings(), os.path.join(LOCAL_VECTORSTORE_DIR, index_name)).clear()
+    else:
+        _get_pinecone_client().Index(index_name).delete(delete_all=True, namespace=namespace)
+
+
+def gc_retired_namespaces(index_name: str, grace_seconds: Optional[float] = None) -> List[str]:
+    """
+    별칭 전환 후 유예 시간(INDEX_GC_GRACE, 기본 1시간)이 지난 이전 네임스페이스를 삭제합니다.
+    유예 시간 동안은 전환 전에 시작된 요청이나 아직 새 디스크립터를 읽지 않은 프로세스가 계속 검색할 수 있습니다.
+    """
+    if grace_seconds is None:
+        grace_seconds = float(os.getenv("INDEX_GC_GRACE", "3600"))
+    descriptor = load_descriptor(index_name)
+    now = time.time()
+    dropped, kept = [], []
+    for item in descriptor.get("retired", []):
+        if item["namespace"] == descriptor.get("namespace") or now - item["retired_at"] < grace_seconds:
+            kept.append(item)
+            continue
+        try:
+            _drop_namespace(index_name, item["namespace"])
+            dropped.append(item["namespace"])
+        except Exception as e:
+            logging.warning(f"이전 네임스페이스 '{item['namespace']}' 삭제 실패 (다음 실행 시 재시도): {e}")
+            kept.append(item)
+    if dropped:
+        descriptor["retired"] = kept
+        _write_descriptor(index_name, descriptor)
+        logging.info(f"인덱스 '{index_name}'의 이전 네임스페이스 삭제: {dropped}")
+    return dropped
+
+
+def deploy_blue_green(
+    index_name: str, split_docs: List[Document], stats: Optional[IngestStats] = None
+) -> Optional[VectorStore]:
+    """
+    새 버전 네임스페이스에 전체 문서를 올리고 점검한 뒤 별칭을 원자적으로 전환합니다.
+    업로드 중에도 기존 live 네임스페이스가 계속 서비스되므로 빈 결과나 반쯤 올라간 결과가 노출되지 않습니다.
+    점검에 실패하면 전환하지 않고 None을 반환합니다. (새 네임스페이스는 즉시 폐기 대상으로 기록)
+    매니페스트는 전환한 뒤에 기록하므로, 실패한 배포가 live 네임스페이스의 매니페스트를 덮어쓰지 않습니다.
+    """
+    gc_retired_namespaces(index_name)
+
+    descriptor = load_descriptor(index_name)
+    old_namespace = descriptor.get("namespace", "")
+    now = time.time()
+    namespace = time.strftime("v%Y%m%d%H%M%S", time.localtime(now)) + f"{int(now * 1000) % 1000:03d}"
+    logging.info(f"인덱스 '{index_name}'의 새 네임스페이스 '{namespace}'를 구성합니다. (현재: '{old_namespace}')")
+
+    vectorstore, _ = _open_vectorstore(index_name, namespace)
+    manifest = sync_documents(
+        vectorstore, index_name, split_docs, existing=set(), namespace=namespace, stats=stats, write_manifest=False
+    )
+    if not _verify_namespace(vectorstore, len(split_docs), probe=split_docs[0].page_content[:200]):
+        logging.error(f"새 네임스페이스 '{namespace}' 점검 실패로 전환을 취소합니다. (live: '{old_namespace}')")
+        # 서비스된 적 없는 네임스페이스이므로 유예 없이 삭제 (실패하면 다음 GC에서 재시도)
+        descriptor = load_descriptor(index_name)
+        descriptor["retired"] = list(descriptor.get("retired", [])) + [{"namespace": namespace, "retired_at": 0}]
+        _write_descriptor(index_name, descriptor)
+        gc_retired_namespaces(index_name)
+        return None
+
+    retired = list(descriptor.get("retired", []))
+    retired.append({"namespace": old_namespace, "retired_at": time.time()})
+    descriptor.update({
+        "namespace": namespace,
+        "vector_count": len(split_docs),
+        "flipped_at": time.time(),
+        "retired": retired,
+        "manifest_synced_at": manifest["synced_at"],
+    })
+    # 디스크립터 교체(코퍼스 버전 증가 포함) 후 프로세스 내 별칭 교체 (둘 다 원자적 교체)
+    with _VSTORE_LOCK:
+        _VSTORE_CACHE[index_name] = vectorstore
+    _publish_change(index_name, descriptor)
+    _write_manifest(index_name, manifest)
+    logging.info(f"인덱스 '{index_name}'의 live 네임스페이스를 '{old_namespace}' -> '{namespace}'로 전환했습니다.")
+    return vectorstore
+
+
+def sync_sources(index_name: str, file_paths: List[str], removed_sources: Optional[List[str]] = None) -> Dict:
+    """
+    변경된 파일(file_paths)과 삭제된 파일(removed_sources, 파일명)의 청크만 live 네임스페이스에 반영합니다.
+    읽기에 실패했거나 청크가 없는 파일은 기존 청크를 지우지 않도록 건너뜁니다.
+    """
+    vectorstore = get_vectorstore(index_name)
+    stats = IngestStats()
+    split_docs = _load_and_split_docs(file_paths, stats)
+    sources = sorted({doc.metadata["source"] for doc in split_docs} | set(removed_sources or []))
+    if not sources:
+        return {}
+    namespace = load_descriptor(index_name).get("namespace", "")
+    manifest = sync_documents(vectorstore, index_name, split_docs, namespace=namespace, stats=stats, sources=sources)
+    if manifest.get("added") or manifest.get("removed"):
+        manifest["corpus_version"] = _publish_change(index_name)
+    return manifest
 
-    # 문서 업로드 조건: recreate=True 이거나, DB가 비어있을 때
+
+_CHUNK_ID_RE = re.compile(r"[0-9a-f]{8}#")
+
+
+def needs_full_sync(vectorstore: VectorStore, index_name: str) -> bool:
+    """
+    매니페스트가 없거나, 청크 id 규칙(<출처 해시 8자>#...)을 따르지 않는 id가 인덱스에 있으면 True
+    (이전 버전이 add_documents로 올린 무작위 UUID id는 출처별 부분 동기화로는 지워지지 않음)
+    """
+    if load_manifest(index_name) is None:
+        return True
+    return any(not _CHUNK_ID_RE.match(doc_id) for doc_id in _existing_ids(vectorstore, index_name))
+
+
+def sync_all_sources(index_name: str, file_paths: List[str]) -> Dict:
+    """
+    출처 필터 없이 전체 문서와 live 네임스페이스를 비교하여 반영합니다.
+    문서에 없는 id(이전 형식 id, 삭제된 파일의 청크)는 모두 삭제됩니다.
+    """
+    vectorstore = get_vectorstore(index_name)
+    stats = IngestStats()
+    split_docs = _load_and_split_docs(file_paths, stats)
+    if not split_docs:  # 문서를 하나도 읽지 못했으면 기존 벡터를 지우지 않음
+        return {}
+    namespace = load_descriptor(index_name).get("namespace", "")
+    manifest = sync_documents(vectorstore, index_name, split_docs, namespace=namespace, stats=stats)
+    if manifest.get("added") or manifest.get("removed"):
+        manifest["corpus_version"] = _publish_change(index_name)
+    return manifest
+
+
+def get_vectorstore(
+    index_name: str = "gaida-hr-rules",
+    recreate: bool = False,
+    verify: Optional[bool] = None,
+) -> VectorStore:
+    """
+    벡터 저장소를 가져오거나 생성합니다. (VECTORSTORE_BACKEND: pinecone | local)
+    - 캐시된 인스턴스(live 네임스페이스 별칭)가 있으면 반환합니다.
+    - recreate=True이면, 문서를 다시 읽어 반영합니다. (INDEX_DEPLOY_MODE)
+        - "incremental"(기본): live 네임스페이스에 변경된 청크만 업서트/삭제
+        - "blue_green": 새 네임스페이스를 채우고 점검한 뒤 별칭 전환
+    - DB가 비어있으면 자동으로 문서를 업로드합니다.
+    - verify=False(recreate=False일 때 기본값)이면 디스크립터로 fast-attach합니다.
+      전체 검증(list_indexes, describe_index_stats)은 수집 시(recreate=True 또는 verify=True)에만 수행합니다.
+    """
+    check_corpus_version(index_name)
+    # 캐시 적중은 잠금 없이 조회 (별칭 교체는 dict 항목 단위로 원자적)
+    cached = None if recreate else _VSTORE_CACHE.get(index_name)
+    if cached is not None:
+        logging.debug(f"캐시된 VectorStore 인스턴스 '{index_name}'를 반환합니다.")
+        return cached
+
+    if verify is None:
+        verify = recreate
+    # 블루/그린 배포 이력이 있으면 디스크립터의 live 네임스페이스에 연결
+    descriptor = load_descriptor(index_name)
+    namespace = descriptor.get("namespace", "")
+    vectorstore, vector_count = _open_vectorstore(index_name, namespace, None if verify else descriptor)
+
+    # 문서 동기화 조건: recreate=True 이거나, DB가 비어있을 때
     if recreate or vector_count == 0:
-        if recreate and vector_count > 0:
-            logging.info(f"인덱스 '{index_name}'의 모든 벡터({vector_count}개)를 삭제합니다.")
-            index.delete(delete_all=True)
-        
-        if EXISTING_HR_DOCS:
-            logging.info(f"존재하는 문서 파일을 DB에 업로드합니다: {EXISTING_HR_DOCS}")
-            split_docs = _load_and_split_docs(EXISTING_HR_DOCS)
-            if split_docs:
-                logging.info(f"총 {len(split_docs)}개 청크를 인덱스 '{index_name}'에 업로드합니다.")
-                vectorstore.add_documents(documents=split_docs, batch_size=100)
+        hr_docs = list_hr_docs()
+        if hr_docs:
+            logging.info(f"존재하는 문서 파일을 DB와 동기화합니다: {hr_docs}")
+            stats = IngestStats()
+            split_docs = _load_and_split_docs(hr_docs, stats)
+            # 문서를 하나도 읽지 못했으면 기존 벡터를 지우지 않도록 동기화하지 않음
+            if split_docs and os.getenv("INDEX_DEPLOY_MODE", "incremental") == "blue_green":
+                return deploy_blue_green(index_name, split_docs, stats) or vectorstore
+            manifest = sync_documents(vectorstore, index_name, split_docs, namespace=namespace, stats=stats) if split_docs else {}
+            if manifest.get("added") or manifest.get("removed"):
+                _publish_change(index_name)
         else:
             logging.warning("존재하는 HR 문서 파일이 없어 업로드를 건너뜁니다.")
     else:
@@ -188,11 +817,26 @@ def get_vectorstore(
 
 if __name__ == "__main__":
     # 스크립트를 직접 실행할 때 벡터 저장소를 생성하고 문서를 업로드합니다.
-    # recreate=True로 설정하면 실행 시마다 기존 문서를 모두 지우고 새로 업로드합니다.
-    logging.info("스크립트를 직접 실행하여 Pinecone 벡터 저장소 설정을 시작합니다.")
+    # recreate=True로 설정하면 실행 시마다 문서를 다시 읽어 변경분을 반영합니다. (INDEX_DEPLOY_MODE)
+    # --gc: 업로드 없이 유예 시간이 지난 이전 블루/그린 네임스페이스만 삭제하고 종료
+    #     python scripts/create_pinecone_index.py --gc [--grace 0]
+    parser = argparse.ArgumentParser(description="벡터 저장소 설정 및 문서 업로드")
+    parser.add_argument("--index-name", default="gaida-hr-rules")
+    parser.add_argument("--gc", action="store_true", help="폐기된 네임스페이스 정리만 수행")
+    parser.add_argument("--grace", type=float, default=None, help="정리 유예 시간(초), 기본값 INDEX_GC_GRACE")
+    args = parser.parse_args()
+    if args.gc:
+        dropped = gc_retired_namespaces(args.index_name, args.grace)
+        logging.info(f"삭제한 네임스페이스: {dropped or '없음'}")
+        raise SystemExit(0)
+
+    logging.info(f"스크립트를 직접 실행하여 벡터 저장소({VECTORSTORE_BACKEND}) 설정을 시작합니다.")
     
-    # 처음 생성하거나, 강제로 문서를 다시 업로드하고 싶을 때 recreate=True
-    vectorstore = get_vectorstore(recreate=False) 
+    # 처음 생성하거나, 변경된 문서를 반영하고 싶을 때 recreate=True (변경된 청크만 동기화)
+    vectorstore = get_vectorstore(args.index_name, recreate=False, verify=True)
+    # 매니페스트가 없거나 이전 형식(UUID) id가 남아 있으면 전체 동기화로 정리 (중복 청크 방지)
+    if vectorstore and needs_full_sync(vectorstore, args.index_name):
+        sync_all_sources(args.index_name, list_hr_docs())
     
     if vectorstore:
         logging.info("벡터 저장소 설정이 성공적으로 완료되었습니다.")
@@ -208,4 +852,7 @@ if __name__ == "__main__":
         except Exception as e:
             logging.error(f"테스트 검색 중 오류 발생: {e}")
     else:
-        logging.error("벡터 저장소 설정에 실패했습니다.")
\ No newline at end of file
+        logging.error("벡터 저장소 설정에 실패했습니다.")
+
+    for model, stats in get_embedding_cache_stats().items():
+        logging.info(f"임베딩 캐시({model}): {stats}")
\ No newline at end of file
@@ -0,0 +1,146 @@
+# embedding_cache.py
+
+import os
+import asyncio
+import sqlite3
+import threading
+from typing import Dict, List
+
+import numpy as np
+import xxhash
+from langchain_core.embeddings import Embeddings
+
+# =========================
+# 임베딩 캐시 (내용 해시 기반, SQLite)
+# =========================
+# 키: xxh3_128(모델명 + "\0" + 텍스트) -> 같은 텍스트는 문서 재업로드/질문 반복 시 API를 다시 호출하지 않습니다.
+# 값: float32 벡터 바이트
+# OpenAI 임베딩은 질문/문서 구분이 없으므로 embed_query와 embed_documents가 같은 키 공간을 공유합니다.
+
+_SQLITE_MAX_VARS = 500  # IN (...) 조회 한 번에 넣을 키 수
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cache_key(model: str, text: str) -> str:
+    return xxhash.xxh3_128_hexdigest(f"{model}\0{text}".encode("utf-8"))
+
+
+class CachedEmbeddings(Embeddings):
+    """임베딩 객체를 감싸 SQLite 캐시를 먼저 조회하는 래퍼"""
+
+    def __init__(self, embeddings: Embeddings, model: str, path: str):
+        self.inner = embeddings
+        self.model = model
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.api_calls = 0
+        self.saved_api_calls = 0
+
+    # ---------- 캐시 조회 / 저장 ----------
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(unique), _SQLITE_MAX_VARS):
+                batch = unique[i:i + _SQLITE_MAX_VARS]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def _insert(self, items: Dict[str, List[float]]) -> None:
+        rows = [(key, np.asarray(vec, dtype=np.float32).tobytes()) for key, vec in items.items()]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def _split(self, texts: List[str]):
+        """(키 목록, 캐시된 벡터, 임베딩이 필요한 {키: 텍스트} (중복 제거))"""
+        keys = [cache_key(self.model, t) for t in texts]
+        found = self._lookup(keys)
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        with self._lock:
+            self.hits += len(texts) - sum(1 for k in keys if k not in found)
+            self.misses += len(missing)
+            if texts and not missing:
+                self.saved_api_calls += 1
+            elif missing:
+                self.api_calls += 1
+        return keys, found, missing
+
+    def _merge(self, keys: List[str], found: Dict[str, List[float]], missing: Dict[str, str], vectors: List[List[float]]) -> List[List[float]]:
+        computed = dict(zip(missing.keys(), vectors))
+        if computed:
+            self._insert(computed)
+            found.update(computed)
+        return [found[k] for k in keys]
+
+    # ---------- Embeddings 인터페이스 ----------
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._split(list(texts))
+        vectors = self.inner.embed_documents(list(missing.values())) if missing else []
+        return self._merge(keys, found, missing, vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, found, missing = self._split([text])
+        vectors = [self.inner.embed_query(text)] if missing else []
+        return self._merge(keys, found, missing, vectors)[0]
+
+    # 비동기 버전: SQLite 조회/저장(commit 포함)은 이벤트 루프를 막지 않도록 스레드에서 실행
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = await asyncio.to_thread(self._split, list(texts))
+        if not missing:
+            return self._merge(keys, found, missing, [])
+        vectors = await self.inner.aembed_documents(list(missing.values()))
+        return await asyncio.to_thread(self._merge, keys, found, missing, vectors)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, found, missing = await asyncio.to_thread(self._split, [text])
+        if not missing:
+            return self._merge(keys, found, missing, [])[0]
+        vectors = [await self.inner.aembed_query(text)]
+        return (await asyncio.to_thread(self._merge, keys, found, missing, vectors))[0]
+
+    # ---------- 통계 ----------
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries, stored = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "api_calls": self.api_calls,
+                "saved_api_calls": self.saved_api_calls,
+                "entries": entries,
+                "bytes_stored": stored,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+
+def embedding_cache_enabled() -> bool:
+    return os.getenv("EMBEDDING_CACHE", "1") == "1"
+
+
+def embedding_cache_path() -> str:
+    # 실행 위치와 관계없이 프로젝트 루트의 .cache/ 사용
+    return os.getenv("EMBEDDING_CACHE_PATH", os.path.join(_PROJECT_ROOT, ".cache", "embeddings.sqlite3"))
+
@@ -0,0 +1,294 @@
+# local_vectorstore.py
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+# =========================
+# 로컬 벡터 저장소 (Pinecone 대체용)
+# =========================
+# 문서 수가 적은 사내 규정 문서는 네트워크 왕복 없이 프로세스 안에서 전수 검색(brute-force)해도 충분히 빠릅니다.
+# - store.json: 현재 버전의 데이터 파일 이름
+# - vectors.<버전>.npy: 정규화된 임베딩 행렬 (float32, 읽기는 mmap)
+# - docs.<버전>.jsonl: 행 순서대로 id / page_content / metadata
+# 정규화된 벡터의 내적 = 코사인 유사도이므로 검색은 행렬-벡터 곱 한 번입니다.
+
+STORE_FILE = "store.json"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """메타데이터 필터: {"key": value} 또는 {"key": {"$in": [...]}} 형태의 단순 일치만 지원"""
+    if not filter:
+        return True
+    for key, expected in filter.items():
+        value = metadata.get(key)
+        if isinstance(expected, dict) and "$in" in expected:
+            if value not in expected["$in"]:
+                return False
+        elif isinstance(expected, dict) and "$eq" in expected:
+            if value != expected["$eq"]:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+class LocalVectorStore(VectorStore):
+    """NumPy 행렬 기반 인메모리(mmap) 벡터 저장소"""
+
+    def __init__(self, embedding: Embeddings, path: str):
+        self._embedding = embedding
+        self.path = path
+        self._lock = threading.Lock()
+        # (벡터 행렬, id 목록, 문서 목록)을 한 번에 교체하여 검색 중에도 일관된 스냅샷을 보장
+        self._data: Tuple[np.ndarray, List[str], List[Document]] = (np.zeros((0, 0), dtype=np.float32), [], [])
+        # 필터별 해당 행 번호 캐시 (필터 검색 시 해당 행만 계산), 스냅샷이 바뀌면 다시 계산
+        self._filter_rows: Dict[str, Tuple[List[Document], np.ndarray]] = {}
+        self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @property
+    def _vectors(self) -> np.ndarray:
+        return self._data[0]
+
+    @property
+    def _ids(self) -> List[str]:
+        return self._data[1]
+
+    @property
+    def _docs(self) -> List[Document]:
+        return self._data[2]
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # ---------- 저장 / 로드 ----------
+    def _current_files(self) -> Optional[Tuple[str, str]]:
+        """
+        store.json이 가리키는 (벡터 파일, 문서 파일) 경로 (아직 저장한 적 없는 새 저장소이면 None)
+        데이터 파일은 있는데 store.json이 없거나 읽을 수 없으면 어떤 버전이 현재인지 알 수 없으므로 오류
+        """
+        store_path = os.path.join(self.path, STORE_FILE)
+        if not os.path.exists(store_path):
+            if os.path.isdir(self.path) and any(n.startswith(("vectors.", "docs.")) for n in os.listdir(self.path)):
+                raise RuntimeError(
+                    f"로컬 벡터 저장소 '{self.path}'에 {STORE_FILE}이 없습니다. 디렉터리를 삭제한 뒤 다시 인덱싱하세요."
+                )
+            return None
+        try:
+            with open(store_path, encoding="utf-8") as f:
+                store = json.load(f)
+            return os.path.join(self.path, store["vectors"]), os.path.join(self.path, store["docs"])
+        except (OSError, ValueError, KeyError) as e:
+            raise RuntimeError(f"로컬 벡터 저장소 '{self.path}'의 {STORE_FILE}을 읽을 수 없습니다: {e}") from e
+
+    def _load(self) -> None:
+        files = self._current_files()
+        if files is None:
+            return
+        vectors_path, docs_path = files
+        try:
+            vectors = np.load(vectors_path, mmap_mode="r")
+            ids, docs = [], []
+            with open(docs_path, encoding="utf-8") as f:
+                for line in f:
+                    row = json.loads(line)
+                    ids.append(row["id"])
+                    docs.append(Document(page_content=row["page_content"], metadata=row["metadata"], id=row["id"]))
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"로컬 벡터 저장소 '{self.path}' 로드 실패, 빈 저장소로 시작합니다: {e}")
+            return
+        if len(ids) != vectors.shape[0]:
+            logging.warning(f"로컬 벡터 저장소 '{self.path}'의 벡터/문서 수가 달라 빈 저장소로 시작합니다.")
+            return
+        self._data = (vectors, ids, docs)
+        logging.info(f"로컬 벡터 저장소 '{self.path}' 로드 완료: {len(ids)}개 벡터.")
+
+    def _save(self, vectors: np.ndarray, ids: List[str], docs: List[Document]) -> None:
+        """
+        새 버전 파일(vectors.<버전>.npy, docs.<버전>.jsonl)을 쓴 뒤 store.json만 교체합니다.
+        mmap으로 열려 있는 벡터 파일을 덮어쓰지 않으므로 Windows에서도 교체가 실패하지 않고,
+        다른 프로세스는 store.json을 다시 읽을 때까지 이전 버전을 온전히 사용합니다.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        previous = {os.path.basename(p) for p in self._current_files() or ()}
+        version = f"{time.time_ns():x}"
+        vectors_name = f"vectors.{version}.npy"
+        docs_name = f"docs.{version}.jsonl"
+
+        np.save(os.path.join(self.path, vectors_name), np.ascontiguousarray(vectors, dtype=np.float32))
+        with open(os.path.join(self.path, docs_name), "w", encoding="utf-8") as f:
+            for doc_id, doc in zip(ids, docs):
+                row = {"id": doc_id, "page_content": doc.page_content, "metadata": doc.metadata}
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        store_path = os.path.join(self.path, STORE_FILE)
+        tmp_store = f"{store_path}.{os.getpid()}.tmp"
+        with open(tmp_store, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "vectors": vectors_name, "docs": docs_name}, f)
+        os.replace(tmp_store, store_path)
+
+        self._data = (np.load(os.path.join(self.path, vectors_name), mmap_mode="r"), ids, docs)
+        self._remove_old_versions(keep=previous | {vectors_name, docs_name})
+
+    def _remove_old_versions(self, keep: set) -> None:
+        """현재와 직전 버전을 제외한 데이터 파일 삭제 (아직 열려 있어 지울 수 없으면 다음 저장 때 다시 시도)"""
+        for name in os.listdir(self.path):
+            if name in keep or not (name.startswith("vectors.") or name.startswith("docs.")):
+                continue
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+
+    # ---------- 쓰기 ----------
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.add_embeddings(texts, self._embedding.embed_documents(texts), metadatas, ids=ids)
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """이미 계산된 임베딩으로 추가 (수집 파이프라인에서 임베딩/업서트 단계를 분리할 때 사용)"""
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in texts]
+        new_vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        new_docs = [Document(page_content=t, metadata=dict(m), id=i) for t, m, i in zip(texts, metadatas, ids)]
+
+        with self._lock:
+            # 같은 id는 덮어쓰기 (upsert)
+            replaced = set(ids)
+            keep = [i for i, doc_id in enumerate(self._ids) if doc_id not in replaced]
+            old_vectors = np.asarray(self._vectors[keep]) if keep else np.zeros((0, new_vectors.shape[1]), dtype=np.float32)
+            self._save(
+                np.vstack([old_vectors, new_vectors]),
+                [self._ids[i] for i in keep] + ids,
+                [self._docs[i] for i in keep] + new_docs,
+            )
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        removed = set(ids)
+        with self._lock:
+            keep = [i for i, doc_id in enumerate(self._ids) if doc_id not in removed]
+            if len(keep) == len(self._ids):
+                return False
+            dim = self._vectors.shape[1] if self._vectors.ndim == 2 else 0
+            vectors = np.asarray(self._vectors[keep]) if keep else np.zeros((0, dim), dtype=np.float32)
+            self._save(vectors, [self._ids[i] for i in keep], [self._docs[i] for i in keep])
+        return True
+
+    def clear(self) -> None:
+        """저장소의 모든 벡터 삭제 (Pinecone의 delete_all에 해당)"""
+        with self._lock:
+            dim = self._vectors.shape[1] if self._vectors.ndim == 2 else 0
+            self._save(np.zeros((0, dim), dtype=np.float32), [], [])
+
+    def get_by_ids(self, ids: List[str], /) -> List[Document]:
+        wanted = set(ids)
+        return [doc for doc in self._docs if doc.id in wanted]
+
+    # ---------- 검색 ----------
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        vectors, _, docs = self._data  # 쓰기와 경합하지 않도록 스냅샷 사용
+        if not docs or k <= 0:
+            return []
+        query = _normalize(np.asarray([embedding], dtype=np.float32))[0]
+        if filter:
+            rows = self._rows_for(filter, docs)
+            if len(rows) == 0:
+                return []
+            scores = np.asarray(vectors[rows]) @ query
+        else:
+            rows = None
+            scores = vectors @ query
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        if rows is not None:
+            return [(docs[rows[i]], float(scores[i])) for i in top]
+        return [(docs[i], float(scores[i])) for i in top]
+
+    def _rows_for(self, filter: Dict[str, Any], docs: List[Document]) -> np.ndarray:
+        key = json.dumps(filter, sort_keys=True, ensure_ascii=False, default=str)
+        cached = self._filter_rows.get(key)
+        if cached is not None and cached[0] is docs:
+            return cached[1]
+        rows = np.fromiter((i for i, d in enumerate(docs) if matches_filter(d.metadata, filter)), dtype=np.intp)
+        self._filter_rows[key] = (docs, rows)
+        return rows
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k, filter)
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        # 코사인 유사도(-1~1)를 0~1 관련도로 변환
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        path: str = os.path.join(".cache", "vectorstore", "default"),
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(embedding, path)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
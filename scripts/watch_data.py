@@ -0,0 +1,130 @@
+# watch_data.py
+"""
+data/ 디렉터리의 마크다운 문서를 감시하여 변경된 파일의 청크만 인덱스에 반영합니다.
+- 폴링 방식 (추가 의존성 없음): 파일별 (수정 시각, 크기)를 비교
+- 디바운스: 마지막 변경 후 --debounce 초 동안 추가 변경이 없을 때 한 번에 동기화
+- 동기화 후 디스크립터의 corpus_version이 올라가므로, 실행 중인 그래프 프로세스는
+  재시작 없이 VectorStore 별칭과 답변 캐시를 다시 구성합니다.
+- --gc-interval 초마다 유예 시간(INDEX_GC_GRACE)이 지난 이전 블루/그린 네임스페이스를 삭제합니다.
+
+실행 (프로젝트 루트에서):
+    python scripts/watch_data.py --interval 1 --debounce 2
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Dict, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT]
+
+from scripts.create_pinecone_index import (  # noqa: E402
+    DOCS_DIRECTORY,
+    gc_retired_namespaces,
+    get_vectorstore,
+    list_hr_docs,
+    load_manifest,
+    needs_full_sync,
+    sync_all_sources,
+    sync_sources,
+)
+
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+def take_snapshot(directory: str) -> Snapshot:
+    """경로 -> (수정 시각(ns), 크기)"""
+    snapshot: Snapshot = {}
+    for path in list_hr_docs(directory):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue  # 스캔 도중 삭제된 파일
+        snapshot[path] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+def diff_snapshots(before: Snapshot, after: Snapshot) -> Tuple[set, set]:
+    """(추가·변경된 경로, 삭제된 경로)"""
+    changed = {p for p, sig in after.items() if before.get(p) != sig}
+    removed = set(before) - set(after)
+    return changed, removed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="data/ 문서 변경 감시 및 증분 인덱싱")
+    parser.add_argument("--index-name", default="gaida-hr-rules")
+    parser.add_argument("--directory", default=DOCS_DIRECTORY)
+    parser.add_argument("--interval", type=float, default=float(os.getenv("WATCH_INTERVAL", "1")), help="폴링 주기(초)")
+    parser.add_argument("--debounce", type=float, default=float(os.getenv("WATCH_DEBOUNCE", "2")), help="마지막 변경 후 대기 시간(초)")
+    parser.add_argument("--gc-interval", type=float, default=float(os.getenv("WATCH_GC_INTERVAL", "60")), help="이전 네임스페이스 정리 주기(초)")
+    args = parser.parse_args()
+
+    # 시작 시 감시 전에 바뀐 내용까지 맞춤: 재생성(recreate) 없이 기존 인덱스에 붙은 뒤
+    # sync_sources로 변경된 청크만 반영 (blue_green 모드에서도 재시작마다 전체 재임베딩/별칭 전환이 일어나지 않음)
+    logging.info(f"'{args.directory}' 감시 시작 전 인덱스 '{args.index_name}'를 동기화합니다.")
+    vectorstore = get_vectorstore(args.index_name, verify=True)  # 인덱스가 비어 있으면 전체 업로드
+
+    known = take_snapshot(args.directory)
+    if needs_full_sync(vectorstore, args.index_name):
+        # 매니페스트가 없거나 이전 형식(UUID) id가 있으면 출처 필터 없이 비교해야 해당 id가 삭제됨
+        logging.info("매니페스트가 없거나 이전 형식의 청크 id가 있어 전체 동기화합니다.")
+        manifest = sync_all_sources(args.index_name, sorted(known))
+    else:
+        indexed = {c.get("source", "") for c in (load_manifest(args.index_name) or {}).get("chunks", {}).values()}
+        removed = sorted(indexed - {os.path.basename(p) for p in known} - {""})
+        manifest = sync_sources(args.index_name, sorted(known), removed_sources=removed)
+    if manifest:
+        logging.info(f"시작 동기화: 추가 {len(manifest['added'])}, 삭제 {len(manifest['removed'])}")
+    pending_changed: set = set()
+    pending_removed: set = set()
+    last_event = 0.0
+    next_gc = 0.0
+    logging.info(f"'{args.directory}' 감시 중 ({len(known)}개 문서, 주기 {args.interval}s, 디바운스 {args.debounce}s)")
+
+    try:
+        while True:
+            time.sleep(args.interval)
+            if time.monotonic() >= next_gc:
+                next_gc = time.monotonic() + args.gc_interval
+                try:
+                    gc_retired_namespaces(args.index_name)  # 유예 시간이 지난 항목만 삭제
+                except Exception as e:
+                    logging.warning(f"이전 네임스페이스 정리 실패 (다음 주기에 재시도): {e}")
+            current = take_snapshot(args.directory)
+            changed, removed = diff_snapshots(known, current)
+            if changed or removed:
+                pending_changed = (pending_changed | changed) - removed
+                pending_removed = (pending_removed | removed) - changed
+                known = current
+                last_event = time.monotonic()
+                logging.info(f"변경 감지: 변경 {sorted(map(os.path.basename, changed))}, 삭제 {sorted(map(os.path.basename, removed))}")
+                continue
+
+            if (pending_changed or pending_removed) and time.monotonic() - last_event >= args.debounce:
+                try:
+                    manifest = sync_sources(
+                        args.index_name,
+                        sorted(p for p in pending_changed if p in current),
+                        removed_sources=[os.path.basename(p) for p in pending_removed],
+                    )
+                except Exception as e:
+                    # 대기 중인 변경을 유지하고 디바운스 후 다시 시도
+                    logging.error(f"동기화 실패, {args.debounce}초 후 재시도합니다: {e}")
+                    last_event = time.monotonic()
+                    continue
+                if manifest:
+                    logging.info(
+                        f"동기화 완료: 추가 {len(manifest['added'])}, 삭제 {len(manifest['removed'])}, "
+                        f"코퍼스 버전 {manifest.get('corpus_version', '변경 없음')}"
+                    )
+                pending_changed, pending_removed = set(), set()
+    except KeyboardInterrupt:
+        logging.info("감시를 종료합니다.")
+
+
+if __name__ == "__main__":
+    main()
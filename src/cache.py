@@ -0,0 +1,402 @@
+# cache.py
+
+import os
+import re
+import json
+import time
+import atexit
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import xxhash
+from langchain_core.documents import Document
+
+from scripts.create_pinecone_index import PROJECT_ROOT, load_descriptor, register_invalidation_hook, get_embeddings
+from retrievers import INDEX_NAME
+
+
+# =========================
+# 질문 정규화
+# =========================
+
+_PUNCT_RE = re.compile(r"[^\w]+")
+
+
+def normalize_question(question: str) -> str:
+    """
+    캐시 키용 질문 정규화
+    - 유니코드 NFKC 정규화, 소문자화
+    - 문장부호/특수문자/공백 제거 ("복지 포인트 안내?" == "복지포인트 안내")
+    """
+    text = unicodedata.normalize("NFKC", question or "").lower()
+    return _PUNCT_RE.sub("", text)
+
+
+# =========================
+# 정확 일치 답변 캐시 (TTL + LRU)
+# =========================
+
+class AnswerCache:
+    """정규화된 refined_question을 키로 하는 TTL + LRU 답변 캐시"""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, question: str) -> Optional[Dict[str, Any]]:
+        key = normalize_question(question)
+        if not key:
+            return None
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or time.monotonic() - item[0] > self.ttl:
+                if item is not None:
+                    del self._data[key]  # 만료
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, question: str, value: Dict[str, Any]) -> None:
+        key = normalize_question(question)
+        if not key:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)  # 가장 오래 사용되지 않은 항목 제거
+
+    def discard(self, question: str) -> None:
+        with self._lock:
+            self._data.pop(normalize_question(question), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# =========================
+# 시맨틱 답변 캐시 (질문 임베딩 유사도)
+# =========================
+
+def _to_record(value: Dict[str, Any]) -> Dict[str, Any]:
+    """캐시 값을 JSON으로 저장 가능한 형태로 변환"""
+    return {
+        **value,
+        "retrieved_docs": [
+            {"page_content": d.page_content, "metadata": d.metadata}
+            for d in value.get("retrieved_docs", [])
+        ],
+    }
+
+
+def _from_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **record,
+        "retrieved_docs": [Document(**d) for d in record.get("retrieved_docs", [])],
+    }
+
+
+class SemanticAnswerCache:
+    """
+    정제 질문 임베딩의 코사인 유사도로 이전 답변을 찾는 캐시
+    - 인메모리 정규화 임베딩 행렬에서 최근접 질문을 찾고, 임계값 이상이면 적중
+    - TTL 만료 + LRU 제거, 적중률 통계, JSON + .npy 파일로 영속화 (지연 저장)
+    - index_name이 주어지면 파일에 코퍼스 버전을 함께 기록하고, 로드 시 버전이 다르면 버림
+      (재인덱싱 후 서버를 재시작해도 이전 문서로 만든 답변을 재사용하지 않음)
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        maxsize: int = 512,
+        ttl: float = 86400.0,
+        path: str = "",
+        save_delay: float = 5.0,
+        index_name: str = "",
+    ):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.save_delay = save_delay
+        self.index_name = index_name
+        self._corpus_version = self._current_corpus_version()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._questions: List[str] = []
+        self._values: List[Dict[str, Any]] = []
+        self._created: List[float] = []
+        self._last_used: List[float] = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._query_vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._load()
+        if self.path:
+            atexit.register(self.flush)
+
+    # --- 임베딩 ---
+    def _remember(self, key: str, vector: List[float]) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32)
+        vec /= (np.linalg.norm(vec) or 1.0)
+        with self._lock:
+            self._query_vectors[key] = vec
+            while len(self._query_vectors) > 256:
+                self._query_vectors.popitem(last=False)
+        return vec
+
+    def _cached_vector(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            return self._query_vectors.get(key)
+
+    def _embed(self, question: str) -> np.ndarray:
+        key = normalize_question(question)
+        vec = self._cached_vector(key)
+        return vec if vec is not None else self._remember(key, get_embeddings().embed_query(question))
+
+    async def _aembed(self, question: str) -> np.ndarray:
+        key = normalize_question(question)
+        vec = self._cached_vector(key)
+        return vec if vec is not None else self._remember(key, await get_embeddings().aembed_query(question))
+
+    # --- 조회 / 저장 ---
+    def _match(self, vec: np.ndarray) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if not self._questions or self._matrix.shape[1] != vec.shape[0]:  # 비었거나 임베딩 모델이 바뀐 경우
+                self.misses += 1
+                return None
+            now = time.time()
+            # 만료된 항목은 제외하고 최근접을 찾음 (만료된 최근접 항목이 유효한 차순위 항목을 가리지 않도록)
+            live = now - np.asarray(self._created) <= self.ttl
+            sims = np.where(live, self._matrix @ vec, -np.inf)
+            idx = int(np.argmax(sims))
+            if not live[idx] or sims[idx] < self.threshold:
+                self.misses += 1
+                return None
+            self._last_used[idx] = now
+            self.hits += 1
+            return self._values[idx]
+
+    def get(self, question: str) -> Optional[Dict[str, Any]]:
+        if not normalize_question(question):
+            return None
+        return self._match(self._embed(question))
+
+    async def aget(self, question: str) -> Optional[Dict[str, Any]]:
+        if not normalize_question(question):
+            return None
+        return self._match(await self._aembed(question))
+
+    def put(self, question: str, value: Dict[str, Any]) -> None:
+        if not normalize_question(question):
+            return
+        vec = self._embed(question)
+        now = time.time()
+        with self._lock:
+            if self._matrix.size and self._matrix.shape[1] != vec.shape[0]:
+                self._reset()  # 임베딩 모델이 바뀐 경우
+            self._questions.append(question)
+            self._values.append(value)
+            self._created.append(now)
+            self._last_used.append(now)
+            self._matrix = np.vstack([self._matrix, vec[None, :]]) if self._matrix.size else vec[None, :].copy()
+            self._evict()
+        self._save()
+
+    def discard(self, question: str) -> None:
+        """정규화된 질문이 같은 항목 제거 (검증에서 불일치로 판정된 답변)"""
+        key = normalize_question(question)
+        if not key:
+            return
+        with self._lock:
+            keep = [i for i, q in enumerate(self._questions) if normalize_question(q) != key]
+            if len(keep) == len(self._questions):
+                return
+            self._keep(keep)
+        self._save()
+
+    def _evict(self) -> None:
+        """만료 항목 제거 후, 크기를 넘으면 가장 오래 사용되지 않은 항목부터 제거 (lock 안에서 호출)"""
+        now = time.time()
+        keep = [i for i, created in enumerate(self._created) if now - created <= self.ttl]
+        if len(keep) > self.maxsize:
+            keep = sorted(keep, key=lambda i: self._last_used[i])[-self.maxsize:]
+            keep.sort()
+        if len(keep) == len(self._questions):
+            return
+        self.evictions += len(self._questions) - len(keep)
+        self._keep(keep)
+
+    def _keep(self, keep: List[int]) -> None:
+        """주어진 위치의 항목만 남김 (lock 안에서 호출)"""
+        self._questions = [self._questions[i] for i in keep]
+        self._values = [self._values[i] for i in keep]
+        self._created = [self._created[i] for i in keep]
+        self._last_used = [self._last_used[i] for i in keep]
+        self._matrix = self._matrix[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+
+    def _reset(self) -> None:
+        self._questions, self._values, self._created, self._last_used = [], [], [], []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def _current_corpus_version(self) -> Optional[int]:
+        if not self.index_name:
+            return None
+        return int(load_descriptor(self.index_name).get("corpus_version", 0))
+
+    def clear(self) -> None:
+        version = self._current_corpus_version()  # 코퍼스 갱신으로 비우는 경우 이후 항목은 새 버전 기준
+        with self._lock:
+            self._reset()
+            self._corpus_version = version
+            self._query_vectors.clear()
+        self._save()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._questions),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    # --- 영속화 ---
+    # 임베딩 행렬은 .npy(바이너리), 질문·답변 등 나머지는 JSON으로 나눠 저장합니다.
+    # 저장은 요청 경로에서 하지 않고, 마지막 변경 후 save_delay초 뒤 백그라운드 타이머가 한 번에 기록합니다.
+    # (종료 시 atexit으로 남은 변경을 기록)
+    def _matrix_path(self) -> str:
+        return os.path.splitext(self.path)[0] + ".npy"
+
+    def _save(self) -> None:
+        """변경 표시 후 저장 예약 (이미 예약되어 있으면 그 타이머가 함께 기록)"""
+        if not self.path:
+            return
+        with self._lock:
+            self._dirty = True
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.save_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        """예약된 변경을 즉시 파일에 기록"""
+        if not self.path:
+            return
+        with self._lock:
+            self._timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            matrix = self._matrix.copy()
+            data = {
+                "corpus_version": self._corpus_version,
+                "entries": [
+                    {
+                        "question": q,
+                        "created": self._created[i],
+                        "last_used": self._last_used[i],
+                        "value": _to_record(self._values[i]),
+                    }
+                    for i, q in enumerate(self._questions)
+                ],
+            }
+        data["embeddings_digest"] = xxhash.xxh3_64_hexdigest(matrix.tobytes())
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            suffix = f".{os.getpid()}.tmp"
+            with self._save_lock:
+                with open(self._matrix_path() + suffix, "wb") as f:
+                    np.save(f, matrix)
+                with open(self.path + suffix, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(self._matrix_path() + suffix, self._matrix_path())
+                os.replace(self.path + suffix, self.path)
+        except OSError as e:
+            print(f"시맨틱 캐시 저장 실패: {e}")
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            entries = data.get("entries", [])
+            if not entries:
+                return
+            matrix = np.load(self._matrix_path())
+        except (OSError, ValueError) as e:
+            print(f"시맨틱 캐시 로드 실패: {e}")
+            return
+        if len(matrix) != len(entries) or xxhash.xxh3_64_hexdigest(matrix.tobytes()) != data.get("embeddings_digest"):
+            print("시맨틱 캐시 임베딩 파일이 항목과 맞지 않아 무시합니다.")
+            return
+        if self.index_name and data.get("corpus_version") != self._corpus_version:
+            print(f"시맨틱 캐시의 코퍼스 버전({data.get('corpus_version')})이 현재({self._corpus_version})와 달라 무시합니다.")
+            return
+        self._questions = [e["question"] for e in entries]
+        self._values = [_from_record(e["value"]) for e in entries]
+        self._created = [e["created"] for e in entries]
+        self._last_used = [e["last_used"] for e in entries]
+        self._matrix = matrix
+        self._evict()
+
+
+# =========================
+# 전역 캐시 인스턴스
+# =========================
+
+def cache_enabled() -> bool:
+    return os.getenv("ANSWER_CACHE", "1") == "1"
+
+
+def semantic_cache_enabled() -> bool:
+    return os.getenv("SEMANTIC_CACHE", "0") == "1"
+
+
+answer_cache = AnswerCache(
+    maxsize=int(os.getenv("ANSWER_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+)
+
+semantic_cache = SemanticAnswerCache(
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+    maxsize=int(os.getenv("SEMANTIC_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "86400")),
+    # 실행 위치(CWD)와 관계없이 프로젝트 루트의 .cache/ 사용
+    path=os.getenv(
+        "SEMANTIC_CACHE_PATH", os.path.join(PROJECT_ROOT, ".cache", "semantic_answer_cache.json")
+    ) if semantic_cache_enabled() else "",
+    save_delay=float(os.getenv("SEMANTIC_CACHE_SAVE_DELAY", "5")),
+    index_name=INDEX_NAME,
+)
+
+# 문서가 다시 업로드되면(get_vectorstore(recreate=True)) 캐시된 답변은 더 이상 유효하지 않습니다.
+register_invalidation_hook(answer_cache.clear)
+register_invalidation_hook(semantic_cache.clear)
@@ -0,0 +1,132 @@
+# categories.py
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from lexical import BM25Index
+from scripts.create_pinecone_index import load_chunks, register_invalidation_hook
+
+# =========================
+# 카테고리(헤더 경로) 색인
+# =========================
+# 청크 메타데이터(doc_title > main_category > sub_category)로 대분류별 색인을 만들고,
+# 질문을 대분류 헤더 문구(하위 소분류 제목 포함)와 BM25로 비교해 한 대분류로 좁혀지면
+# 벡터 검색에 메타데이터 필터를 걸어 해당 대분류 안에서만 검색합니다.
+# 애매하면(점수 부족, 1·2위 차이 작음) 필터 없이 전체에서 검색합니다.
+#
+# RETRIEVAL_PREFILTER: "none"(기본) | "category"
+# CATEGORY_MIN_SCORE: 대분류로 좁히기 위한 최소 BM25 점수 (기본 1.0)
+# CATEGORY_MARGIN: 1위 점수가 2위의 몇 배 이상이어야 하는지 (기본 1.5)
+
+_NUMBERING_RE = re.compile(r"^\s*\d+(?:\.\d+)*\.?\s*")
+
+
+def _strip_numbering(header: str) -> str:
+    """"1.1 연차휴가" -> "연차휴가" (번호가 BM25 매칭에 섞이지 않도록)"""
+    return _NUMBERING_RE.sub("", header or "")
+
+
+class CategoryIndex:
+    """(doc_title, main_category)별 소분류·청크 수 색인과 질문 -> 대분류 매칭"""
+
+    def __init__(self, chunks: List[Document]):
+        groups: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        for doc in chunks:
+            title = doc.metadata.get("doc_title", "")
+            main = doc.metadata.get("main_category", "")
+            if not main:
+                continue  # 대분류 이전의 문서 서두는 필터 대상에서 제외
+            group = groups.setdefault((title, main), {"doc_title": title, "main_category": main, "sub_categories": [], "chunks": 0})
+            group["chunks"] += 1
+            sub = doc.metadata.get("sub_category", "")
+            if sub and sub not in group["sub_categories"]:
+                group["sub_categories"].append(sub)
+
+        self.categories: List[Dict] = list(groups.values())
+        self._bm25 = BM25Index([
+            " ".join(_strip_numbering(h) for h in [c["main_category"], *c["sub_categories"]])
+            for c in self.categories
+        ])
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def match(self, question: str) -> Optional[Dict]:
+        """질문이 확실히 한 대분류에 속하면 그 카테고리, 아니면 None"""
+        ranked = self._bm25.top_k(question, 2)
+        if not ranked:
+            return None
+        best, best_score = ranked[0]
+        second_score = ranked[1][1] if len(ranked) > 1 else 0.0
+        if best_score < float(os.getenv("CATEGORY_MIN_SCORE", "1.0")):
+            return None
+        if second_score and best_score < float(os.getenv("CATEGORY_MARGIN", "1.5")) * second_score:
+            return None
+        return self.categories[best]
+
+    def filter_for(self, question: str) -> Optional[Dict]:
+        """벡터 검색용 메타데이터 필터 (Pinecone / LocalVectorStore 공통 형식)"""
+        category = self.match(question)
+        if category is None:
+            return None
+        return {
+            "doc_title": {"$eq": category["doc_title"]},
+            "main_category": {"$eq": category["main_category"]},
+        }
+
+
+_INDEX: Optional[CategoryIndex] = None
+_LOCK = threading.Lock()
+_STATS: Dict[str, int] = {"filtered": 0, "unfiltered": 0}
+
+
+def prefilter_enabled() -> bool:
+    return os.getenv("RETRIEVAL_PREFILTER", "none") == "category"
+
+
+def get_category_index() -> CategoryIndex:
+    """로컬 문서 청크로 만든 카테고리 색인 (문서 갱신 시 다시 생성)"""
+    global _INDEX
+    index = _INDEX
+    if index is not None:
+        return index
+    with _LOCK:
+        if _INDEX is None:
+            _INDEX = CategoryIndex(load_chunks())
+        return _INDEX
+
+
+def clear_category_index() -> None:
+    global _INDEX
+    _INDEX = None
+
+
+def category_filter(question: str) -> Optional[Dict]:
+    """RETRIEVAL_PREFILTER=category일 때 질문에 맞는 메타데이터 필터 (좁힐 수 없으면 None)"""
+    if not prefilter_enabled():
+        return None
+    try:
+        f = get_category_index().filter_for(question)
+    except Exception as e:
+        print(f"카테고리 색인 오류 (필터 없이 검색): {e}")
+        f = None
+    with _LOCK:
+        _STATS["filtered" if f else "unfiltered"] += 1
+    return f
+
+
+def get_category_stats() -> Dict[str, float]:
+    """필터 적용 횟수와 비율"""
+    with _LOCK:
+        stats: Dict[str, float] = dict(_STATS)
+    total = stats["filtered"] + stats["unfiltered"]
+    stats["filtered_rate"] = stats["filtered"] / total if total else 0.0
+    return stats
+
+
+register_invalidation_hook(clear_category_index)
@@ -0,0 +1,95 @@
+# context.py
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+# =========================
+# RAG 컨텍스트 조립
+# =========================
+# RecursiveCharacterTextSplitter(chunk_overlap=200)로 나눈 인접 청크는 앞 청크의 끝부분이
+# 다음 청크의 앞부분에 그대로 반복됩니다. 같은 출처·헤더 경로의 청크를 겹치는 구간 기준으로
+# 이어 붙여 중복 없이 한 단락으로 만들고, 답변 생성과 검증이 같은 컨텍스트 문자열을 사용합니다.
+# - 한 청크가 다른 청크에 통째로 포함되면 제외
+# - 이어 붙인 단락은 그룹에서 가장 순위가 높은 청크 자리에 둡니다. (재순위화 순서 유지)
+#
+# CONTEXT_MIN_OVERLAP: 인접 청크로 볼 최소 겹침 글자 수 (기본 20)
+
+HEADER_KEYS = ("doc_title", "main_category", "sub_category")
+
+
+def _group_key(doc: Document) -> Tuple[str, ...]:
+    return (doc.metadata.get("source", ""), *(doc.metadata.get(k, "") for k in HEADER_KEYS))
+
+
+def _overlap_len(head: str, tail: str, min_overlap: int) -> int:
+    """head의 끝과 tail의 앞이 겹치는 가장 긴 글자 수 (min_overlap 미만이면 0)"""
+    if min_overlap <= 0 or len(head) < min_overlap or len(tail) < min_overlap:
+        return 0
+    probe = tail[:min_overlap]
+    start = max(0, len(head) - len(tail))
+    pos = head.find(probe, start)
+    while pos != -1:
+        # 가장 앞 위치부터 확인하므로 처음 맞는 위치가 가장 긴 겹침
+        if tail.startswith(head[pos:]):
+            return len(head) - pos
+        pos = head.find(probe, pos + 1)
+    return 0
+
+
+def _merge_group(texts: List[str], min_overlap: int) -> List[str]:
+    """같은 그룹의 청크 본문을 겹치는 구간 기준으로 이어 붙임 (이어지지 않는 청크는 별도 단락)"""
+    texts = [t.strip() for t in texts]
+    # 다른 청크에 통째로 포함된 청크 제외
+    texts = [t for i, t in enumerate(texts) if not any(j != i and t in u and (len(u) > len(t) or j < i) for j, u in enumerate(texts))]
+
+    merged = True
+    while merged and len(texts) > 1:
+        merged = False
+        for i in range(len(texts)):
+            for j in range(len(texts)):
+                if i == j:
+                    continue
+                n = _overlap_len(texts[i], texts[j], min_overlap)
+                if n:
+                    texts[i] = texts[i] + texts[j][n:]
+                    del texts[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return texts
+
+
+def assemble_docs(docs: List[Document], min_overlap: Optional[int] = None) -> List[Document]:
+    """
+    같은 출처·헤더 경로의 인접 청크를 합쳐 겹치는 구간을 제거한 단락 목록
+
+    Args:
+        docs: 재순위화된 청크 (관련도 순)
+        min_overlap: 인접 청크로 볼 최소 겹침 글자 수 (기본값: CONTEXT_MIN_OVERLAP)
+    """
+    if min_overlap is None:
+        min_overlap = int(os.getenv("CONTEXT_MIN_OVERLAP", "20"))
+
+    groups: Dict[Tuple[str, ...], List[Document]] = {}
+    for doc in docs:
+        groups.setdefault(_group_key(doc), []).append(doc)
+
+    passages: List[Document] = []
+    for group in groups.values():
+        if len(group) == 1:
+            passages.append(group[0])
+            continue
+        for text in _merge_group([d.page_content for d in group], min_overlap):
+            passages.append(Document(page_content=text, metadata=dict(group[0].metadata)))
+    return passages
+
+
+def build_context(docs: List[Document]) -> str:
+    """답변 생성/검증 프롬프트에 공통으로 넣을 출처 문서 문자열 ([번호] (출처) 본문)"""
+    context = ""
+    for i, doc in enumerate(docs, start=1):
+        context += f"[{i}] ({doc.metadata.get('source', 'unknown')})\n{doc.page_content}\n\n"
+    return context
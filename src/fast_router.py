@@ -0,0 +1,152 @@
+# fast_router.py
+
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+# =========================
+# 규칙 기반 빠른 라우터
+# =========================
+# 키워드만으로 판단이 확실한 질문은 LLM 없이 바로 분류하고,
+# 애매한 질문(아무 것도 안 걸리거나 여러 갈래가 동시에 걸리는 경우)만 LLM 라우터로 넘깁니다.
+# 정규식은 모듈 임포트 시 한 번만 컴파일합니다.
+
+# 2차 라우터 프롬프트의 "부서별 담당 업무" 중, HR 규정 질문과 겹치지 않는 키워드만 사용
+# (예: "장비", "출장", "비용", "지급", "급여"는 규정 안내 질문에도 자주 나오므로 제외)
+# "서버", "계정"처럼 단독으로는 뜻이 넓은 단어는 장애·요청 표현과 함께 쓰인 경우만 매칭
+DEPARTMENT_KEYWORDS: Dict[str, List[str]] = {
+    "재무": ["세금", "예산", "회계", "송금", "계산서", "청구서", "환급"],
+    "총무": ["비품", "사무용품", "우편", "택배", "시설", "차량", "청소", "숙박"],
+    "인프라": [
+        "VPN", "서버 장애", "서버 접속", "네트워크 장애", "네트워크 연결", "인터넷 연결",
+        "소프트웨어 설치", "프로그램 설치", "접속 오류", "접속이 안", "접속 안", "계정 잠금", "계정 생성",
+    ],
+    "보안": ["해킹", "유출", "침해", "랜섬웨어", "백신", "방화벽", "악성코드", "비밀번호"],
+    "인사": ["채용", "인사평가", "퇴직금", "승진", "입사", "퇴사"],
+}
+
+# 문서(RAG)로 답할 수 있는 HR 규정/제도 주제
+# "규정", "정책", "제도", "안내", "기준" 같은 일반 단어는 넣지 않습니다.
+# (질문 정제 단계가 대부분의 질문을 "… 안내" 형태로 바꾸므로 HR이 아닌 질문도 걸림)
+RAG_KEYWORDS: List[str] = [
+    "연차", "월차", "반차", "휴가", "휴직", "병가", "경조사", "복지", "복지 포인트", "교육비",
+    "동호회", "동아리", "재택", "근무시간", "시차 출근", "건강검진", "자기계발", "육아", "출산", "난임", "가족돌봄",
+]
+
+# 규정·비용 처리처럼 HR 규정 질문에도 쓰이는 표현: 부서 키워드와 함께 나오면 LLM에 맡김
+# (예: "서버 비용 처리 규정", "숙박비 지급 기준")
+HR_CONTEXT_KEYWORDS: List[str] = [
+    "규정", "규칙", "정책", "제도", "지침", "기준", "비용", "경비", "수당", "급여", "지원금", "지급",
+]
+
+# 1차 라우터 기준의 "HR과 관련 없는 경우"
+NON_HR_KEYWORDS: List[str] = [
+    "주민등록번호", "주민번호", "여권번호", "계좌번호",
+    "매출", "영업이익", "재정 상황", "주가", "투자 유치", "신규 프로젝트", "내부 문건",
+    "법률 자문", "법률 상담", "소송", "고소", "변호사",
+]
+
+
+# 개인 처리 요청 표현 (승인·신청·계산 등): 2차 라우터 기준으로는 담당 부서 연결 대상일 수 있어 LLM에 맡김
+ACTION_KEYWORDS: List[str] = [
+    "승인", "신청해", "신청 해", "계산", "처리해", "처리 해", "정산해", "변경해", "취소해", "등록해",
+]
+
+
+def _compile(keywords: List[str]) -> "re.Pattern[str]":
+    # 공백 유무와 관계없이 매칭 ("시차 출근" == "시차출근")
+    parts = [r"\s*".join(map(re.escape, kw.split())) for kw in keywords]
+    return re.compile("|".join(parts), re.IGNORECASE)
+
+
+_DEPARTMENT_RES = {name: _compile(kws) for name, kws in DEPARTMENT_KEYWORDS.items()}
+_RAG_RE = _compile(RAG_KEYWORDS)
+_HR_CONTEXT_RE = _compile(HR_CONTEXT_KEYWORDS)
+# 처리 요청 표현, 또는 "내 휴가" / "제 급여"처럼 본인 건을 가리키는 표현
+_ACTION_RE = re.compile(_compile(ACTION_KEYWORDS).pattern + r"|(?:^|\s)(?:내|제|나의|저의)\s+\S", re.IGNORECASE)
+_NON_HR_RE = re.compile(
+    _compile(NON_HR_KEYWORDS).pattern + r"|\d{6}\s*-\s*[1-4]\d{6}|^invalid_input$", re.IGNORECASE
+)
+
+_LOCK = threading.Lock()
+_STATS: Dict[str, int] = {
+    "hr_fast_true": 0,        # 1차: 규칙으로 HR 판정
+    "hr_fast_false": 0,       # 1차: 규칙으로 비HR 판정
+    "hr_llm": 0,              # 1차: LLM으로 넘김
+    "route_fast_rag": 0,      # 2차: 규칙으로 RAG 판정
+    "route_fast_department": 0,  # 2차: 규칙으로 부서 판정
+    "route_llm": 0,           # 2차: LLM으로 넘김
+}
+
+
+def fast_router_enabled() -> bool:
+    return os.getenv("FAST_ROUTER", "0") == "1"
+
+
+def _count(key: str) -> None:
+    with _LOCK:
+        _STATS[key] += 1
+
+
+def _departments(text: str) -> List[str]:
+    return [name for name, pattern in _DEPARTMENT_RES.items() if pattern.search(text)]
+
+
+def classify_hr(user_question: str, refined_question: str) -> Optional[bool]:
+    """
+    1차 라우터 빠른 경로
+    Returns:
+        True/False: 규칙으로 확실히 판정된 경우, None: LLM 판단 필요
+    """
+    text = f"{refined_question}\n{user_question}".strip()
+    if _NON_HR_RE.search(refined_question.strip()) or _NON_HR_RE.search(text):
+        # 비HR 신호와 HR 주제가 함께 있으면 LLM에 맡김
+        if _RAG_RE.search(text) or _departments(text):
+            _count("hr_llm")
+            return None
+        _count("hr_fast_false")
+        return False
+    if _ACTION_RE.search(text):
+        # 개인 처리 요청은 HR 주제 용어가 있어도 LLM 판단
+        _count("hr_llm")
+        return None
+    if _RAG_RE.search(text):
+        # 구체적인 HR 주제 용어가 있을 때만 HR로 확정 (부서 키워드만 있으면 LLM 판단)
+        _count("hr_fast_true")
+        return True
+    _count("hr_llm")
+    return None
+
+
+def classify_route(question: str) -> Optional[Dict[str, str]]:
+    """
+    2차 라우터 빠른 경로
+    Returns:
+        {"route": "rag"} 또는 {"route": "department", "department": 부서명}, 애매하면 None
+    """
+    if _ACTION_RE.search(question):
+        _count("route_llm")
+        return None
+    departments = _departments(question)
+    has_rag_topic = bool(_RAG_RE.search(question))
+    # 부서 키워드가 하나만 걸리고 HR 주제·규정 표현이 없을 때만 부서로 확정
+    if len(departments) == 1 and not has_rag_topic and not _HR_CONTEXT_RE.search(question):
+        _count("route_fast_department")
+        return {"route": "department", "department": departments[0]}
+    if has_rag_topic and not departments:
+        _count("route_fast_rag")
+        return {"route": "rag"}
+    _count("route_llm")
+    return None
+
+
+def get_fast_router_stats() -> Dict[str, float]:
+    """경로별 처리 횟수와 LLM 생략 비율"""
+    with _LOCK:
+        stats: Dict[str, float] = dict(_STATS)
+    hr_total = stats["hr_fast_true"] + stats["hr_fast_false"] + stats["hr_llm"]
+    route_total = stats["route_fast_rag"] + stats["route_fast_department"] + stats["route_llm"]
+    stats["hr_fast_rate"] = (hr_total - stats["hr_llm"]) / hr_total if hr_total else 0.0
+    stats["route_fast_rate"] = (route_total - stats["route_llm"]) / route_total if route_total else 0.0
+    return stats
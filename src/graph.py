@@ -1,65 +1,175 @@
 # graph.py
 
 # ========== 임포트 ==========
+import os
+from typing import Optional
 from langgraph.graph import StateGraph, START, END
 from state import State
 from nodes import refine_question, retrieve, rerank, generate_rag_answer, verify_rag_answer, generate_contact_answer, update_hr_status, generate_reject_answer, update_rag_status
-from router import route_after_hr, route_after_rag
+from nodes import lookup_answer_cache, store_answer_cache, alookup_answer_cache
+from nodes import front_door, afront_door
+from nodes import launch_speculative_retrieve, discard_speculative_retrieve
+from nodes import assemble_context
+from nodes import arefine_question, aretrieve, arerank, agenerate_rag_answer, averify_rag_answer, aupdate_hr_status, aupdate_rag_status
+from router import route_after_hr, route_after_rag, route_after_cache, route_after_front_door
+from retrievers import start_warm_up
+
+
+# ========== 노드 구현 (동기 / 비동기) ==========
+# 비동기 그래프는 LLM·Pinecone 대기 중 워커 스레드를 점유하지 않습니다. (graph.ainvoke / astream 사용)
+SYNC_NODES = {
+    "refine_question": refine_question,
+    "front_door": front_door,
+    "lookup_answer_cache": lookup_answer_cache,
+    "update_hr_status": update_hr_status,
+    "update_rag_status": update_rag_status,
+    "retrieve": retrieve,
+    "rerank": rerank,
+    "generate_rag_answer": generate_rag_answer,
+    "verify_rag_answer": verify_rag_answer,
+}
+
+ASYNC_NODES = {
+    "refine_question": arefine_question,
+    "front_door": afront_door,
+    "lookup_answer_cache": alookup_answer_cache,
+    "update_hr_status": aupdate_hr_status,
+    "update_rag_status": aupdate_rag_status,
+    "retrieve": aretrieve,
+    "rerank": arerank,
+    "generate_rag_answer": agenerate_rag_answer,
+    "verify_rag_answer": averify_rag_answer,
+}
 
 
 # ========== 그래프 빌더 ==========
-builder = StateGraph(State)
-
-# ========== 노드 등록(흐름 순서) ==========
-# 흐름: START -> refine_question -> hr_node -> (router2 | reject)
-# 흐름: router2 -> (retrieve | department)
-# 흐름: retrieve -> rerank -> generate_rag_answer -> verify_rag_answer -> END
-
-# 사전 쿼리 분석
-builder.add_node("refine_question", refine_question)
-
-# 1차 라우터
-builder.add_node("update_hr_status", update_hr_status)
-builder.add_node("generate_reject_answer", generate_reject_answer)  # 터미널
-
-# 2차 라우터 및 담당자 안내
-builder.add_node("update_rag_status", update_rag_status)
-builder.add_node("generate_contact_answer", generate_contact_answer)  # 터미널
-
-# RAG 파이프라인
-builder.add_node("retrieve", retrieve)
-builder.add_node("rerank", rerank)
-builder.add_node("generate_rag_answer", generate_rag_answer)
-builder.add_node("verify_rag_answer", verify_rag_answer)
-
-# ========== 엣지(흐름 순서) ==========
-# 시작과 쿼리 분석
-builder.add_edge(START, "refine_question")
-builder.add_edge("refine_question", "update_hr_status")
-
-# 1차 라우터: HR이면 router2, 아니면 reject
-builder.add_conditional_edges(
-    "update_hr_status",
-    route_after_hr,
-    {"router2": "update_rag_status", "reject": "generate_reject_answer"},
-)
-
-# 2차 라우터: rag는 retrieve(검색), department는 터미널
-builder.add_conditional_edges(
-    "update_rag_status",
-    route_after_rag,
-    {"rag": "retrieve", "department": "generate_contact_answer"},
-)
-
-# RAG 파이프라인
-builder.add_edge("retrieve", "rerank")
-builder.add_edge("rerank", "generate_rag_answer")
-builder.add_edge("generate_rag_answer", "verify_rag_answer")
-builder.add_edge("verify_rag_answer", END)
-
-# 터미널 경로
-builder.add_edge("generate_contact_answer", END)
-builder.add_edge("generate_reject_answer", END)
+def build_graph(use_async: bool = False, topology: str = "", speculative: Optional[bool] = None):
+    """
+    HR 챗봇 그래프를 구성하고 컴파일합니다.
+
+    Args:
+        use_async (bool): True이면 비동기 노드로 구성 (ainvoke/astream 전용)
+        topology (str): 질문 분석 구간 구성 (비우면 GRAPH_TOPOLOGY 환경변수, 기본값 "three_node")
+            - "three_node": refine_question -> update_hr_status -> update_rag_status (LLM 3회)
+            - "fused": front_door 하나로 정제 + 1·2차 라우팅 (LLM 1회)
+        speculative (bool): True이면 1·2차 라우터와 병렬로 벡터 검색을 미리 시작
+            (None이면 GRAPH_SPECULATIVE 환경변수, three_node 구성에서만 적용)
+    """
+    nodes = ASYNC_NODES if use_async else SYNC_NODES
+    topology = topology or os.getenv("GRAPH_TOPOLOGY", "three_node")
+    if speculative is None:
+        speculative = os.getenv("GRAPH_SPECULATIVE", "0") == "1"
+    # fused 구성은 라우팅 LLM 호출이 하나뿐이라 숨길 지연이 없습니다.
+    speculative = speculative and topology != "fused"
+    builder = StateGraph(State)
+
+    # ========== 노드 등록(흐름 순서) ==========
+    # [three_node]
+    # 흐름: START -> refine_question -> lookup_answer_cache -> (END | hr_node)
+    #       (speculative: lookup_answer_cache -> launch_speculative_retrieve -> hr_node)
+    # 흐름: hr_node -> (router2 | reject)
+    # 흐름: router2 -> (retrieve | department)
+    # [fused]
+    # 흐름: START -> front_door -> lookup_answer_cache -> (END | reject | retrieve | department)
+    # [공통]
+    # 흐름: retrieve -> rerank -> assemble_context -> generate_rag_answer -> verify_rag_answer -> store_answer_cache -> END
+    #       (speculative: reject/department -> discard_speculative_retrieve -> END)
+
+    if topology == "fused":
+        # 정제 + 1·2차 라우터 통합
+        builder.add_node("front_door", nodes["front_door"])
+    else:
+        # 사전 쿼리 분석
+        builder.add_node("refine_question", nodes["refine_question"])
+
+        # 1차 라우터
+        builder.add_node("update_hr_status", nodes["update_hr_status"])
+
+        # 2차 라우터
+        builder.add_node("update_rag_status", nodes["update_rag_status"])
+
+    if speculative:
+        # 라우팅과 병렬로 미리 검색, 거절/담당자 안내 시 결과 폐기
+        builder.add_node("launch_speculative_retrieve", launch_speculative_retrieve)
+        builder.add_node("discard_speculative_retrieve", discard_speculative_retrieve)
+
+    # 답변 캐시 (정규화된 정제 질문 기준)
+    builder.add_node("lookup_answer_cache", nodes["lookup_answer_cache"])
+    builder.add_node("store_answer_cache", store_answer_cache)
+
+    # 거절 및 담당자 안내
+    builder.add_node("generate_reject_answer", generate_reject_answer)  # 터미널
+    builder.add_node("generate_contact_answer", generate_contact_answer)  # 터미널
+
+    # RAG 파이프라인
+    builder.add_node("retrieve", nodes["retrieve"])
+    builder.add_node("rerank", nodes["rerank"])
+    builder.add_node("assemble_context", assemble_context)  # CPU 작업만 하므로 동기/비동기 공용
+    builder.add_node("generate_rag_answer", nodes["generate_rag_answer"])
+    builder.add_node("verify_rag_answer", nodes["verify_rag_answer"])
+
+    # ========== 엣지(흐름 순서) ==========
+    if topology == "fused":
+        builder.add_edge(START, "front_door")
+        builder.add_edge("front_door", "lookup_answer_cache")
+
+        # 캐시 적중 시 종료, 아니면 통합 분류 결과로 분기
+        builder.add_conditional_edges(
+            "lookup_answer_cache",
+            route_after_front_door,
+            {"hit": END, "reject": "generate_reject_answer", "rag": "retrieve", "department": "generate_contact_answer"},
+        )
+    else:
+        # 시작과 쿼리 분석
+        builder.add_edge(START, "refine_question")
+        builder.add_edge("refine_question", "lookup_answer_cache")
+
+        # 캐시 적중 시 검색/생성/검증 없이 종료
+        builder.add_conditional_edges(
+            "lookup_answer_cache",
+            route_after_cache,
+            {"hit": END, "miss": "launch_speculative_retrieve" if speculative else "update_hr_status"},
+        )
+        if speculative:
+            builder.add_edge("launch_speculative_retrieve", "update_hr_status")
+
+        # 1차 라우터: HR이면 router2, 아니면 reject
+        builder.add_conditional_edges(
+            "update_hr_status",
+            route_after_hr,
+            {"router2": "update_rag_status", "reject": "generate_reject_answer"},
+        )
+
+        # 2차 라우터: rag는 retrieve(검색), department는 터미널
+        builder.add_conditional_edges(
+            "update_rag_status",
+            route_after_rag,
+            {"rag": "retrieve", "department": "generate_contact_answer"},
+        )
+
+    # RAG 파이프라인
+    builder.add_edge("retrieve", "rerank")
+    builder.add_edge("rerank", "assemble_context")
+    builder.add_edge("assemble_context", "generate_rag_answer")
+    builder.add_edge("generate_rag_answer", "verify_rag_answer")
+    builder.add_edge("verify_rag_answer", "store_answer_cache")
+    builder.add_edge("store_answer_cache", END)
+
+    # 터미널 경로
+    if speculative:
+        builder.add_edge("generate_contact_answer", "discard_speculative_retrieve")
+        builder.add_edge("generate_reject_answer", "discard_speculative_retrieve")
+        builder.add_edge("discard_speculative_retrieve", END)
+    else:
+        builder.add_edge("generate_contact_answer", END)
+        builder.add_edge("generate_reject_answer", END)
+
+    return builder.compile()
+
 
 # ========== 공개 그래프 ==========
-graph = builder.compile()
\ No newline at end of file
+graph = build_graph()
+async_graph = build_graph(use_async=True)
+
+# 서버 시작 시 retriever 생성 + 예열 쿼리 (RETRIEVER_WARMUP=0이면 생략)
+start_warm_up()
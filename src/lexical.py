@@ -0,0 +1,76 @@
+# lexical.py
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+# =========================
+# 한국어 문자 n-gram 토크나이저
+# =========================
+# 형태소 분석기 없이도 "병가", "가족돌봄휴가" 같은 용어가 조사와 붙어 있어도 매칭되도록
+# 어절을 문자 n-gram으로 분해합니다.
+
+_TOKEN_RE = re.compile(r"[0-9a-zA-Z가-힣]+")
+
+
+def char_ngrams(text: str, n: int = 2) -> List[str]:
+    """텍스트를 어절 단위로 나눈 뒤 문자 n-gram 리스트로 변환"""
+    tokens: List[str] = []
+    for word in _TOKEN_RE.findall((text or "").lower()):
+        if len(word) <= n:
+            tokens.append(word)
+            continue
+        tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return tokens
+
+
+# =========================
+# BM25 역색인
+# =========================
+
+class BM25Index:
+    """문자 n-gram 기반 Okapi BM25 역색인"""
+
+    def __init__(self, texts: Sequence[str], k1: float = 1.5, b: float = 0.75, n: int = 2):
+        self.k1 = k1
+        self.b = b
+        self.n = n
+        self.doc_lens: List[int] = []
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+
+        for doc_id, text in enumerate(texts):
+            counts = Counter(char_ngrams(text, n))
+            self.doc_lens.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term][doc_id] = tf
+
+        self.avgdl = (sum(self.doc_lens) / len(self.doc_lens)) if self.doc_lens else 0.0
+        total = len(self.doc_lens)
+        self.idf: Dict[str, float] = {
+            term: math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.doc_lens)
+
+    def scores(self, query: str) -> List[float]:
+        """모든 문서에 대한 BM25 점수 (역색인에 있는 문서만 계산)"""
+        scores = [0.0] * len(self.doc_lens)
+        if not self.avgdl:
+            return scores
+        for term in set(char_ngrams(query, self.n)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf[term]
+            for doc_id, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lens[doc_id] / self.avgdl)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def top_k(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """점수가 0보다 큰 상위 k개 문서의 (문서 번호, 점수)"""
+        ranked = sorted(enumerate(self.scores(query)), key=lambda x: x[1], reverse=True)
+        return [(doc_id, score) for doc_id, score in ranked[:k] if score > 0]
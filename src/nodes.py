@@ -4,12 +4,22 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import json
-from typing import Dict, List, Tuple, Optional, TypedDict, Literal, cast
+from typing import Dict, List, Optional, TypedDict, Literal, cast
 from langchain_core.documents import Document
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
 from state import State
 from utils import get_llm
-from scripts.create_pinecone_index import get_vectorstore
+from rerankers import get_reranker, get_async_reranker, order_by_scores
+import speculation
+import fast_router
+import verifiers
+from cache import answer_cache, cache_enabled, semantic_cache, semantic_cache_enabled
+from retrievers import INDEX_NAME, get_retriever, aget_retriever
+from scripts.create_pinecone_index import check_corpus_version
+from categories import category_filter
+import selection
+import context as rag_context
 
 
 # =============================================
@@ -44,11 +54,8 @@ def _get_question(state: State) -> str:
     return ""
 
 
-def refine_question(state: State) -> dict:
-    _llm = get_llm("gen")
-    question = _get_question(state)
-
-    prompt = f"""
+def _refine_prompt(question: str) -> str:
+    return f"""
     당신은 "가이다 플레이 스튜디오(GPS)" HR 챗봇의 전처리 노드입니다.
     사용자의 질문을 정제해 주세요.
     규칙:
@@ -82,86 +89,253 @@ def refine_question(state: State) -> dict:
     위 규칙으로 불필요한 내용은 제거하고 출력하라.
     """.strip()
 
-    result = _llm.invoke(prompt).content.strip() if question else ""
+
+def refine_question(state: State) -> dict:
+    _llm = get_llm("gen")
+    question = _get_question(state)
+
+    result = _llm.invoke(_refine_prompt(question)).content.strip() if question else ""
+    return {
+        "user_question": question,
+        "refined_question": result
+    }
+
+
+async def arefine_question(state: State) -> dict:
+    _llm = get_llm("gen")
+    question = _get_question(state)
+
+    result = (await _llm.ainvoke(_refine_prompt(question))).content.strip() if question else ""
     return {
         "user_question": question,
         "refined_question": result
     }
 
 
+# =============================================
+# Node: 답변 캐시 조회 / 저장
+# =============================================
+
+def _cache_hit_update(question: str, cached: Optional[dict]) -> dict:
+    if cached is None:
+        return {"cache_hit": False}
+
+    print(f"➡️ 캐시된 답변 반환: {question}")
+    return {
+        "messages": [AIMessage(content=cached["final_answer"])],
+        "final_answer": cached["final_answer"],
+        "answer_type": cached["answer_type"],
+        "retrieved_docs": cached["retrieved_docs"],
+        "cache_hit": True,
+    }
+
+
+def lookup_answer_cache(state: State) -> dict:
+    """
+    정규화된 정제 질문으로 캐시를 조회하여, 적중 시 저장된 답변을 그대로 반환
+    정확 일치 캐시를 먼저 보고, SEMANTIC_CACHE=1이면 임베딩 유사도 캐시도 조회합니다.
+    조회 전에 코퍼스 버전을 확인하여, 다른 프로세스가 재인덱싱했으면 캐시를 먼저 비웁니다.
+    (적중하면 검색을 거치지 않으므로 검색 경로의 확인만으로는 이전 답변이 계속 반환됨)
+    """
+    check_corpus_version(INDEX_NAME)
+    question = state.get("refined_question", "")
+    cached = answer_cache.get(question) if cache_enabled() else None
+    if cached is None and semantic_cache_enabled():
+        try:
+            cached = semantic_cache.get(question)
+        except Exception as e:  # 임베딩 API 오류 등은 캐시 미스로 처리
+            print(f"시맨틱 캐시 조회 오류: {e}")
+    return _cache_hit_update(question, cached)
+
+
+async def alookup_answer_cache(state: State) -> dict:
+    """lookup_answer_cache의 비동기 버전 (질문 임베딩을 비동기로 계산)"""
+    check_corpus_version(INDEX_NAME)
+    question = state.get("refined_question", "")
+    cached = answer_cache.get(question) if cache_enabled() else None
+    if cached is None and semantic_cache_enabled():
+        try:
+            cached = await semantic_cache.aget(question)
+        except Exception as e:  # 임베딩 API 오류 등은 캐시 미스로 처리
+            print(f"시맨틱 캐시 조회 오류: {e}")
+    return _cache_hit_update(question, cached)
+
+
+def _cache_answer(state: State) -> None:
+    question = state.get("refined_question", "")
+    value = {
+        "final_answer": state["final_answer"],
+        "answer_type": state.get("answer_type", "rag_answer"),
+        "retrieved_docs": state.get("retrieved_docs", []),
+    }
+    if cache_enabled():
+        answer_cache.put(question, value)
+    if semantic_cache_enabled():
+        try:
+            semantic_cache.put(question, value)
+        except Exception as e:
+            print(f"시맨틱 캐시 저장 오류: {e}")
+
+
+def store_answer_cache(state: State) -> dict:
+    """
+    검증에서 일치로 판정된 RAG 답변만 캐시에 저장
+    - 백그라운드 검증 중(pending)이면 저장하지 않고, 검증 작업이 일치로 판정한 뒤 저장합니다.
+      (검증이 먼저 끝나 불일치 답변이 뒤늦게 캐시되는 경쟁 조건 방지)
+    - 샘플링에서 빠진(skipped) 답변은 검증되지 않았으므로 TTL 동안 재사용하지 않습니다.
+    """
+    if not state.get("final_answer") or state.get("verification") != "일치함":
+        return {}
+    _cache_answer(state)
+    return {}
+
+
 # =============================================
 # Node: 리트리버 생성
 # =============================================
 
+def _search_kwargs(question: str) -> dict:
+    """
+    유사도 높은 문서 3개 (CONTEXT_SELECTION=budget이면 CONTEXT_FETCH_K개 후보),
+    RETRIEVAL_PREFILTER=category이면 질문에 맞는 대분류로 좁혀 검색
+    """
+    search_kwargs: dict = {"k": selection.fetch_k() if selection.budget_enabled() else 3}
+    metadata_filter = category_filter(question)
+    if metadata_filter:
+        search_kwargs["filter"] = metadata_filter
+    return search_kwargs
+
+
+def _search_docs(question: str) -> List[Document]:
+    # 레지스트리에 등록된 retriever로 검색합니다. (인덱스 연결은 최초 1회)
+    retriever = get_retriever("gaida-hr-rules", **_search_kwargs(question))
+    return retriever.invoke(question)
+
+
+async def _asearch_docs(question: str) -> List[Document]:
+    # 최초 호출 시 인덱스 연결이 블로킹 I/O이므로 스레드에서 생성합니다.
+    retriever = await aget_retriever("gaida-hr-rules", **_search_kwargs(question))
+    return await retriever.ainvoke(question)
+
+
 def retrieve(state: State) -> dict:
-    # 미리 생성된 Pinecone 인덱스에 연결하여 retriever를 생성합니다.
-    # db.py의 get_vectorstore 함수를 사용하여 기존 인덱스를 가져옵니다.
-    vs = get_vectorstore(index_name="gaida-hr-rules")
-    
     refined_question = state.get("refined_question", "") or _get_question(state) or ""
     if not refined_question:
         # 질문이 없으면 빈 리스트를 반환합니다.
         return {"retrieved_docs": []}
-        
-    # retriever를 사용하여 유사도 높은 문서를 3개 검색합니다.
-    retriever = vs.as_retriever(search_kwargs={"k": 3})
-    docs = retriever.invoke(refined_question)
+
+    # 라우팅 중에 미리 시작한 검색 결과가 있으면 사용합니다.
+    docs = speculation.claim(state.get("speculation_id", ""))
+    if docs is None:
+        docs = _search_docs(refined_question)
     
-    return {"retrieved_docs": docs}
+    return {"retrieved_docs": docs, "speculation_id": ""}
+
+
+async def aretrieve(state: State) -> dict:
+    refined_question = state.get("refined_question", "") or _get_question(state) or ""
+    if not refined_question:
+        return {"retrieved_docs": []}
+
+    docs = await speculation.aclaim(state.get("speculation_id", ""))
+    if docs is None:
+        docs = await _asearch_docs(refined_question)
+
+    return {"retrieved_docs": docs, "speculation_id": ""}
+
+
+# =============================================
+# Node: 추측 검색 (라우팅과 병렬 실행)
+# =============================================
+
+def launch_speculative_retrieve(state: State) -> dict:
+    """라우터 LLM 호출과 병렬로 벡터 검색을 미리 시작"""
+    question = state.get("refined_question", "")
+    if not question:
+        return {"speculation_id": ""}
+    return {"speculation_id": speculation.launch(_search_docs, question)}
+
+
+def discard_speculative_retrieve(state: State) -> dict:
+    """거절/담당자 안내로 끝난 경우 미리 시작한 검색 결과를 버림"""
+    speculation.discard(state.get("speculation_id", ""))
+    return {"speculation_id": ""}
 
 
 # =============================================
 # Node: 재순위화(정규식 기반 파싱 유지)
 # =============================================
 
+def _top_docs(docs: List[Document], scores: List[Optional[float]]) -> List[Document]:
+    """상위 3개, CONTEXT_SELECTION=budget이면 점수 하한·MMR·토큰 예산으로 개수를 정함"""
+    if selection.budget_enabled():
+        return selection.select_docs(docs, scores)
+    return order_by_scores(docs, scores)[:3]
+
+
 def rerank(state: State) -> dict:
-    llm = get_llm("gen")
+    """
+    검색된 문서를 질문 관련도 순으로 재정렬
+    백엔드는 RERANK_BACKEND 환경변수로 선택합니다. (llm_batch | llm_per_doc | lexical)
+    CONTEXT_SELECTION=budget이면 상위 3개 대신 토큰 예산 안에서 MMR로 고릅니다. (selection.py)
+    """
     question = _get_question(state)
-    if not question or not state.get("retrieved_docs"):
-        return {"retrieved_docs": state.get("retrieved_docs", [])}
-
-    import re
-    scored: List[Tuple[Document, float]] = []
-
-    for doc in state.get("retrieved_docs", []):
-        prompt = f"""
-        질문: "{question}"
-        문서 내용: "{doc.page_content}"
-        0~1 사이 숫자로 관련도만 출력:
-        """.strip()
-        txt = (llm.invoke(prompt).content or "").strip()
-        cleaned = txt.replace(",", ".")
-        m = re.search(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?", cleaned)
-        try:
-            score = float(m.group()) if m else 0.0
-        except Exception:
-            score = 0.0
-        score = max(0.0, min(1.0, score))
-        scored.append((doc, score))
+    docs = state.get("retrieved_docs", [])
+    if not question or not docs:
+        return {"retrieved_docs": docs}
+
+    scores = get_reranker()(question, docs)
 
-    scored.sort(key=lambda x: x[1], reverse=True)
-    top_docs = [doc for doc, _ in scored[:3]]
-    return {"retrieved_docs": top_docs}
+    return {"retrieved_docs": _top_docs(docs, scores)}
+
+
+async def arerank(state: State) -> dict:
+    """
+    rerank의 비동기 버전
+    문서별 채점을 asyncio.gather로 동시에 실행하며(RERANK_CONCURRENCY, RERANK_TIMEOUT),
+    실패하거나 시간 초과된 문서는 벡터 유사도 순위를 유지합니다.
+    """
+    question = _get_question(state)
+    docs = state.get("retrieved_docs", [])
+    if not question or not docs:
+        return {"retrieved_docs": docs}
+
+    scores = await get_async_reranker()(question, docs)
+
+    return {"retrieved_docs": _top_docs(docs, scores)}
+
+
+# =============================================
+# Node: 컨텍스트 조립 (겹치는 청크 병합)
+# =============================================
+
+def assemble_context(state: State) -> dict:
+    """
+    같은 출처·헤더 경로의 인접 청크를 겹치는 구간 없이 합치고(context.py),
+    답변 생성과 검증이 함께 쓸 컨텍스트 문자열을 만듭니다. (출처 번호는 합친 단락 기준)
+    """
+    docs = rag_context.assemble_docs(state.get("retrieved_docs", []))
+    return {"retrieved_docs": docs, "rag_context": rag_context.build_context(docs)}
+
+
+def _get_context(state: State) -> str:
+    # 조립 단계를 거치지 않고 호출된 경우에는 검색 문서로 바로 구성
+    return state.get("rag_context") or rag_context.build_context(state.get("retrieved_docs", []))
 
 
 # =========================
 # Answer_type: Rag_answer
 # =========================
 
-def generate_rag_answer(state: State) -> dict:
-    _llm = get_llm("gen")
+def _rag_answer_prompt(state: State) -> Optional[str]:
+    """답변 생성 프롬프트 (질문이나 출처가 없으면 None)"""
     question = _get_question(state)
-    if not question:
-        return {"final_answer": "문서에 근거가 없어 답변드리기 어렵습니다. 다시 질문해주세요."}
-
-    context = ""
-    for i, doc in enumerate(state.get("retrieved_docs", []), start=1):
-        context += f"[{i}] ({doc.metadata.get('source', 'unknown')})\n{doc.page_content}\n\n"
+    context = _get_context(state)
 
-    if not context.strip():
-        return {"final_answer": "문서에 근거가 없어 답변드리기 어렵습니다. 관련 출처가 검색되지 않았습니다."}
+    if not question or not context.strip():
+        return None
 
-    prompt = f"""
+    return f"""
     당신은 "가이다 플레이 스튜디오(GPS)"의 친절한 HR 정책 안내 챗봇입니다.
     아래 출처 문서 내용만을 근거로 해서 질문에 대해 명확하고 간결하게 답변하세요.
     문서에 명시된 내용이 없으면 "문서에 근거가 없어 답변드리기 어렵습니다."라고 답해야 합니다.
@@ -177,6 +351,19 @@ def generate_rag_answer(state: State) -> dict:
     # 답변
     """.strip()
 
+
+def _no_rag_answer(state: State) -> dict:
+    if not _get_question(state):
+        return {"final_answer": "문서에 근거가 없어 답변드리기 어렵습니다. 다시 질문해주세요."}
+    return {"final_answer": "문서에 근거가 없어 답변드리기 어렵습니다. 관련 출처가 검색되지 않았습니다."}
+
+
+def generate_rag_answer(state: State) -> dict:
+    _llm = get_llm("gen")
+    prompt = _rag_answer_prompt(state)
+    if prompt is None:
+        return _no_rag_answer(state)
+
     answer = _llm.invoke(prompt).content.strip()
     return {
         "messages": [AIMessage(content=answer)],
@@ -184,25 +371,35 @@ def generate_rag_answer(state: State) -> dict:
     }
 
 
+async def agenerate_rag_answer(state: State) -> dict:
+    _llm = get_llm("gen")
+    prompt = _rag_answer_prompt(state)
+    if prompt is None:
+        return _no_rag_answer(state)
+
+    answer = (await _llm.ainvoke(prompt)).content.strip()
+    return {
+        "messages": [AIMessage(content=answer)],
+        "final_answer": answer
+    }
+
+
 # =============================================
 # Node: RAG 답변 검증
 # =============================================
 
-def verify_rag_answer(state: State) -> dict:
-    _llm = get_llm("gen")
-
-    # [수정] 검증을 위해 문서의 '이름'이 아닌 '내용'을 컨텍스트로 구성합니다.
-    context = ""
-    for doc in state.get("retrieved_docs", []):
-        context += f"- {doc.page_content}\n"
+def _verify_prompt(state: State) -> Optional[str]:
+    """검증 프롬프트 (컨텍스트나 답변이 없으면 None)"""
+    # [수정] 검증을 위해 문서의 '이름'이 아닌 '내용'을 컨텍스트로 구성합니다. (답변 생성과 같은 컨텍스트)
+    context = _get_context(state)
 
     final_answer = state.get("final_answer", "")
 
     # [추가] 컨텍스트나 답변이 없으면 검증이 무의미하므로 '불일치함'으로 처리합니다.
     if not context.strip() or not final_answer.strip():
-        return {"verification": "불일치함"}
+        return None
 
-    prompt = f"""
+    return f"""
     당신은 생성된 답변이 주어진 문서 내용에만 근거했는지 검증하는 AI 평가자입니다.
     '답변'이 아래 '문서' 내용과 완전히 일치하는 경우에만 '일치함'을, 조금이라도 다르거나 관련 없는 내용이 있다면 '불일치함'을 출력하세요.
     다른 어떤 설명도 추가하지 말고, '일치함' 또는 '불일치함' 두 단어 중 하나로만 답변해야 합니다.
@@ -216,16 +413,99 @@ def verify_rag_answer(state: State) -> dict:
     # 판단 (일치함/불일치함):
     """.strip()
 
-    verdict = _llm.invoke(prompt).content.strip()
 
+def _parse_verdict(verdict: str) -> dict:
     # [개선] LLM이 지시를 어기고 "네, 일치합니다."와 같이 답변해도 처리 가능
-    if "일치함" in verdict:
+    # "불일치"를 먼저 확인 ("불일치함" 안에도 "일치함"이 들어 있으므로)
+    if "불일치" in verdict:
+        final_verdict = "불일치함"
+    elif "일치" in verdict:
         final_verdict = "일치함"
     else:
         final_verdict = "불일치함"
     return {"verification": final_verdict}
 
 
+def _llm_verify(state: State) -> dict:
+    _llm = get_llm("gen")
+    prompt = _verify_prompt(state)
+    if prompt is None:
+        return {"verification": "불일치함"}
+
+    verdict = _llm.invoke(prompt).content.strip()
+    return _parse_verdict(verdict)
+
+
+def _local_verify(state: State) -> dict:
+    """로컬 근거 검사 (VERIFY_BACKEND=local): 문장별 n-gram/수치 대조, LLM 호출 없음"""
+    return verifiers.check_groundedness(state.get("final_answer", ""), state.get("retrieved_docs", []))
+
+
+def _run_verify(state: State) -> dict:
+    if verifiers.verify_backend() == "local":
+        return _local_verify(state)
+    return _llm_verify(state)
+
+
+def _background_verify(snapshot: State) -> dict:
+    """백그라운드 검증: 일치로 판정된 답변만 캐시에 저장, 불일치면 같은 질문의 캐시 항목도 제거"""
+    result = _run_verify(snapshot)
+    if result["verification"] == "일치함":
+        if snapshot.get("final_answer"):
+            _cache_answer(snapshot)
+    else:
+        question = snapshot.get("refined_question", "")
+        answer_cache.discard(question)
+        if semantic_cache_enabled():
+            semantic_cache.discard(question)
+    return result
+
+
+def _verify_off_path(state: State, config: Optional[RunnableConfig]) -> Optional[dict]:
+    """
+    샘플링/백그라운드 모드 처리 (VERIFY_SAMPLE_RATE, VERIFY_MODE)
+    그래프 안에서 바로 검증해야 하면 None을 반환합니다.
+    """
+    if not verifiers.should_verify():
+        return {"verification": "skipped"}
+    if verifiers.verify_mode() != "background":
+        return None
+
+    snapshot = cast(State, {
+        "refined_question": state.get("refined_question", ""),
+        "retrieved_docs": state.get("retrieved_docs", []),
+        "rag_context": state.get("rag_context", ""),
+        "final_answer": state.get("final_answer", ""),
+        "answer_type": state.get("answer_type", "rag_answer"),
+    })
+    thread_id = str(((config or {}).get("configurable") or {}).get("thread_id", ""))
+    verification_id = verifiers.submit_background(_background_verify, snapshot, thread_id)
+    return {"verification": "pending", "verification_id": verification_id}
+
+
+def verify_rag_answer(state: State, config: Optional[RunnableConfig] = None) -> dict:
+    off_path = _verify_off_path(state, config)
+    if off_path is not None:
+        return off_path
+    return _run_verify(state)
+
+
+async def averify_rag_answer(state: State, config: Optional[RunnableConfig] = None) -> dict:
+    off_path = _verify_off_path(state, config)
+    if off_path is not None:
+        return off_path
+    if verifiers.verify_backend() == "local":
+        return _local_verify(state)
+
+    _llm = get_llm("gen")
+    prompt = _verify_prompt(state)
+    if prompt is None:
+        return {"verification": "불일치함"}
+
+    verdict = (await _llm.ainvoke(prompt)).content.strip()
+    return _parse_verdict(verdict)
+
+
 
 
 # =============================================
@@ -244,11 +524,8 @@ DEPARTMENTS = {
     "인사": {"name": "인사", "email": "hr@gaida.play.com", "slack": "#ask-hr"},
 }
 
-def update_hr_status(state: State) -> State:
-    """
-    HR 여부만 판별, 그 결과를 상태에 저장
-    """
-    prompt = f"""
+def _hr_prompt(state: State) -> str:
+    return f"""
     당신은 "가이다 플레이 스튜디오(GPS)"의 HR 정책 안내 챗봇입니다.
     원본 질문을 참고해서 정제 질문이 HR 관련인지 판별하세요.
 
@@ -273,18 +550,50 @@ def update_hr_status(state: State) -> State:
     HR과 관련있는 경우:
     {{"is_hr_question": true}}
     """
-    _llm = get_llm("router1")
-    structured_llm = _llm.with_structured_output(HRAnalysis)
 
-    result: HRAnalysis = structured_llm.invoke(prompt)
-    is_hr = result["is_hr_question"]
 
+def _hr_status_update(state: State, is_hr: bool) -> State:
     # HR 여부에 따라 answer_type 세팅
     answer_type = "pending" if is_hr else "reject"
 
     return cast(State, {**state, "is_hr_question": is_hr, "answer_type": answer_type})
 
 
+def _fast_hr(state: State) -> Optional[bool]:
+    """키워드 규칙으로 확실한 경우에만 HR 여부 반환 (FAST_ROUTER=1)"""
+    if not fast_router.fast_router_enabled():
+        return None
+    return fast_router.classify_hr(state.get("user_question", ""), state.get("refined_question", ""))
+
+
+def update_hr_status(state: State) -> State:
+    """
+    HR 여부만 판별, 그 결과를 상태에 저장
+    """
+    fast = _fast_hr(state)
+    if fast is not None:
+        return _hr_status_update(state, fast)
+
+    _llm = get_llm("router1")
+    structured_llm = _llm.with_structured_output(HRAnalysis)
+
+    result: HRAnalysis = structured_llm.invoke(_hr_prompt(state))
+    return _hr_status_update(state, result["is_hr_question"])
+
+
+async def aupdate_hr_status(state: State) -> State:
+    """update_hr_status의 비동기 버전"""
+    fast = _fast_hr(state)
+    if fast is not None:
+        return _hr_status_update(state, fast)
+
+    _llm = get_llm("router1")
+    structured_llm = _llm.with_structured_output(HRAnalysis)
+
+    result: HRAnalysis = await structured_llm.ainvoke(_hr_prompt(state))
+    return _hr_status_update(state, result["is_hr_question"])
+
+
 # =========================
 # Answer_type: Reject
 # =========================
@@ -309,10 +618,8 @@ class RAGDepartmentAnalysis(TypedDict, total=False):
     route: str  # "rag" 또는 "department"
     department: str  # department인 경우에만 값이 있음
 
-def _classify_rag_or_department(question: str) -> Dict[str, str]:
-    """LLM을 사용한 통합 분류: RAG vs 담당자 안내 + 부서 결정"""
-    
-    system_prompt = f"""
+def _rag_department_prompt(question: str) -> str:
+    return f"""
     당신은 "가이다 플레이 스튜디오(GPS)" HR 챗봇의 질문 분류 전문가입니다.
     정제된 질문을 분석하여 어떻게 처리할지 결정해주세요.
 
@@ -358,6 +665,16 @@ def _classify_rag_or_department(question: str) -> Dict[str, str]:
     부득이하게 재무, 총무, 인프라, 보안 부서에 해당하지 않을 경우에는 인사로 지정해주세요.
     """
 
+
+def _classify_rag_or_department(question: str) -> Dict[str, str]:
+    """LLM을 사용한 통합 분류: RAG vs 담당자 안내 + 부서 결정"""
+    if fast_router.fast_router_enabled():
+        fast = fast_router.classify_route(question)
+        if fast is not None:
+            return fast
+
+    system_prompt = _rag_department_prompt(question)
+
     _llm = get_llm("router2")
     structured_llm = _llm.with_structured_output(RAGDepartmentAnalysis)
     
@@ -370,15 +687,28 @@ def _classify_rag_or_department(question: str) -> Dict[str, str]:
         # 기본값: 인사팀 담당자 안내로 라우팅
         return {"route": "department", "department": "인사"}
 
-def update_rag_status(state: State) -> State:
-    """LLM 기반 질문 분류 및 라우팅 상태 업데이트"""
-    question = state['refined_question']
-    
-    print(f" LLM 기반 질문 분류 시작...")
-    
-    # LLM을 통한 통합 분류
-    classification_result = _classify_rag_or_department(question)
-    
+
+async def _aclassify_rag_or_department(question: str) -> Dict[str, str]:
+    """_classify_rag_or_department의 비동기 버전"""
+    if fast_router.fast_router_enabled():
+        fast = fast_router.classify_route(question)
+        if fast is not None:
+            return fast
+
+    _llm = get_llm("router2")
+    structured_llm = _llm.with_structured_output(RAGDepartmentAnalysis)
+
+    try:
+        result: RAGDepartmentAnalysis = await structured_llm.ainvoke(_rag_department_prompt(question))
+        return result
+
+    except Exception as e:
+        print(f"LLM 분류 오류: {e}")
+        return {"route": "department", "department": "인사"}
+
+
+def _rag_status_update(state: State, classification_result: Dict[str, str]) -> State:
+    """분류 결과를 라우팅 상태로 변환"""
     route = classification_result.get("route")
     department_name = classification_result.get("department")
     
@@ -395,6 +725,109 @@ def update_rag_status(state: State) -> State:
         return cast(State, {**state, "is_rag_suitable": False, "department_info": department_info, "answer_type": "department_contact"})
 
 
+def update_rag_status(state: State) -> State:
+    """LLM 기반 질문 분류 및 라우팅 상태 업데이트"""
+    question = state['refined_question']
+    
+    print(f" LLM 기반 질문 분류 시작...")
+    
+    # LLM을 통한 통합 분류
+    classification_result = _classify_rag_or_department(question)
+    return _rag_status_update(state, classification_result)
+
+
+async def aupdate_rag_status(state: State) -> State:
+    """update_rag_status의 비동기 버전"""
+    print(f" LLM 기반 질문 분류 시작...")
+    classification_result = await _aclassify_rag_or_department(state['refined_question'])
+    return _rag_status_update(state, classification_result)
+
+
+# =============================================
+# Node: 통합 프런트 도어 (정제 + HR 판별 + RAG/부서 분류를 한 번에)
+# =============================================
+
+class FrontDoorAnalysis(TypedDict):
+    refined_question: str  # 정제된 질문
+    is_hr_question: bool   # HR 관련 여부
+    route: str             # "rag" 또는 "department" (HR이 아니면 "rag"로 둠)
+    department: str        # department인 경우 부서명, 아니면 빈 문자열
+
+
+def _front_door_prompt(question: str) -> str:
+    return f"""
+    당신은 "가이다 플레이 스튜디오(GPS)" HR 챗봇의 질문 분석기입니다.
+    사용자 질문을 한 번에 정제하고 분류하여 refined_question, is_hr_question, route, department를 반환하세요.
+
+    사용자 질문: "{question}"
+
+    # 1. 질문 정제 (refined_question)
+    - 기본 언어는 한국어입니다. 한국어 없이 전부 영어로만 입력된 경우 "invalid_input"으로 둡니다.
+    - 불필요한 특수문자와 중복 공백을 제거하고, 기본 문장부호(?, !, ., ,)는 보존합니다.
+    - 동의어, 유의어, 줄임말, 초성 표현을 HR 표준 용어로 바꿉니다.
+      예시: "쉬려고 하는데 하루에 반만" → "반차 안내", "출근 좀 늦게 해도 돼?" → "시차 출근 제도",
+            "복지 point 얼마지?" → "복지 포인트 안내", "대휴" → "대체휴가", "내규" → "내부규칙"
+
+    # 2. HR 관련 여부 (is_hr_question)
+    - false: 개인정보(주민등록번호, 이름), 회사 내부 보안 내용(재정 상황, 신규 프로젝트, 내부 문건),
+             법률 자문 요청이나 법률 상담 톤의 질문, "invalid_input"
+    - true: HR(인사/근무/휴가/복지/장비·보안/출장·비용처리 등)
+
+    # 3. 처리 방식 (route, department)
+    - "rag": 회사 규정, 정책, 제도에 대한 일반적인 정보성 질문 (department는 빈 문자열)
+    - "department": 개인별 처리, 실시간 승인, 문제 해결·신고, 개별 상담이 필요한 질문
+      부서별 담당 업무:
+      - 재무: 세금, 예산, 회계, 지출, 송금, 계산서, 청구서, 지급, 비용, 환급
+      - 총무: 사무실, 비품, 물품, 구매, 수령, 우편, 사무용품, 시설, 행사, 차량, 청소, 자산, 출장, 숙박, 교통
+      - 인프라: 서버, 네트워크, 컴퓨터, IT, 소프트웨어, 장비, 시스템, 접속, VPN, 계정, 접근
+      - 보안: 보안, 해킹, 정보, 유출, 침해, 랜섬웨어, 백신, 데이터, 비밀번호, 방화벽, 악성코드, 암호
+      - 인사: 개별 급여 문의, 채용, 인사평가, 퇴직, 퇴직금 계산 및 지급, 입사, 퇴사, 평가, 승진, 개인적 근무 상담
+      부서명은 재무, 총무, 인프라, 보안, 인사 중 하나이며, 해당하는 부서가 없으면 인사로 지정합니다.
+    """.strip()
+
+
+def _front_door_update(state: State, question: str, result: FrontDoorAnalysis) -> State:
+    """통합 분석 결과를 3단계 노드와 같은 상태 필드로 변환"""
+    refined = (result.get("refined_question") or "").strip()
+    is_hr = bool(result.get("is_hr_question")) and bool(refined) and refined != "invalid_input"
+    update = _hr_status_update(
+        cast(State, {**state, "user_question": question, "refined_question": refined}), is_hr
+    )
+    if not is_hr:
+        return update
+    return _rag_status_update(update, {"route": result.get("route", ""), "department": result.get("department", "")})
+
+
+def front_door(state: State) -> State:
+    """refine_question + update_hr_status + update_rag_status를 한 번의 구조화 출력 호출로 처리"""
+    question = _get_question(state)
+    if not question:
+        return _hr_status_update(cast(State, {**state, "user_question": "", "refined_question": ""}), False)
+
+    structured_llm = get_llm("front_door").with_structured_output(FrontDoorAnalysis)
+    try:
+        result: FrontDoorAnalysis = structured_llm.invoke(_front_door_prompt(question))
+    except Exception as e:
+        print(f"LLM 통합 분류 오류: {e}")
+        result = {"refined_question": question, "is_hr_question": True, "route": "department", "department": "인사"}
+    return _front_door_update(state, question, result)
+
+
+async def afront_door(state: State) -> State:
+    """front_door의 비동기 버전"""
+    question = _get_question(state)
+    if not question:
+        return _hr_status_update(cast(State, {**state, "user_question": "", "refined_question": ""}), False)
+
+    structured_llm = get_llm("front_door").with_structured_output(FrontDoorAnalysis)
+    try:
+        result: FrontDoorAnalysis = await structured_llm.ainvoke(_front_door_prompt(question))
+    except Exception as e:
+        print(f"LLM 통합 분류 오류: {e}")
+        result = {"refined_question": question, "is_hr_question": True, "route": "department", "department": "인사"}
+    return _front_door_update(state, question, result)
+
+
 # =========================
 # Answer_type: Department_contact
 # =========================
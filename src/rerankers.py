@@ -0,0 +1,217 @@
+# rerankers.py
+
+import os
+import re
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, TypedDict
+from langchain_core.documents import Document
+from utils import get_llm
+from lexical import BM25Index
+
+# 재순위화 백엔드: (질문, 후보 문서) -> 문서별 0~1 점수 (채점되지 않은 문서는 None)
+Reranker = Callable[[str, List[Document]], List[Optional[float]]]
+# 비동기 백엔드: 실패하거나 시간 초과된 문서의 점수는 None
+AsyncReranker = Callable[[str, List[Document]], Awaitable[List[Optional[float]]]]
+
+
+# =========================
+# LLM 백엔드
+# =========================
+
+class RerankScore(TypedDict):
+    index: int    # 후보 문서 번호 (0부터 시작)
+    score: float  # 0~1 사이 관련도
+
+
+class RerankBatch(TypedDict):
+    scores: List[RerankScore]
+
+
+def _parse_score(txt: str) -> float:
+    """LLM 응답 문자열에서 0~1 사이 점수를 추출"""
+    cleaned = (txt or "").strip().replace(",", ".")
+    m = re.search(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?", cleaned)
+    try:
+        score = float(m.group()) if m else 0.0
+    except Exception:
+        score = 0.0
+    return max(0.0, min(1.0, score))
+
+
+def _per_doc_prompt(question: str, doc: Document) -> str:
+    return f"""
+    질문: "{question}"
+    문서 내용: "{doc.page_content}"
+    0~1 사이 숫자로 관련도만 출력:
+    """.strip()
+
+
+def score_llm_per_doc(question: str, docs: List[Document]) -> List[float]:
+    """문서마다 LLM을 한 번씩 호출하여 점수를 매기는 기존 방식"""
+    llm = get_llm("gen")
+    return [_parse_score(llm.invoke(_per_doc_prompt(question, doc)).content) for doc in docs]
+
+
+def _batch_prompt(question: str, docs: List[Document]) -> str:
+    candidates = ""
+    for i, doc in enumerate(docs):
+        candidates += f"[{i}]\n{doc.page_content}\n\n"
+
+    return f"""
+    아래 후보 문서 각각이 질문과 얼마나 관련 있는지 0~1 사이 숫자로 평가하세요.
+    모든 후보 문서에 대해 index(후보 번호)와 score(관련도)를 하나씩 반환해야 합니다.
+
+    질문: "{question}"
+
+    # 후보 문서
+    {candidates}
+    """.strip()
+
+
+def _batch_scores(result: RerankBatch, size: int) -> List[Optional[float]]:
+    """
+    구조화 출력 결과를 후보 순서의 점수 리스트로 변환
+    모델이 빠뜨린 후보는 None (시간 초과와 같이 벡터 유사도 순위 자리를 유지)
+    """
+    scores: List[Optional[float]] = [None] * size
+    for item in result.get("scores", []):
+        idx = item.get("index")
+        if isinstance(idx, int) and 0 <= idx < size:
+            scores[idx] = max(0.0, min(1.0, float(item.get("score", 0.0))))
+    return scores
+
+
+def score_llm_batch(question: str, docs: List[Document]) -> List[Optional[float]]:
+    """모든 후보 문서를 한 번의 구조화 출력 호출로 채점 (실패 시 문서별 채점으로 대체)"""
+    try:
+        structured_llm = get_llm("gen").with_structured_output(RerankBatch)
+        result: RerankBatch = structured_llm.invoke(_batch_prompt(question, docs))
+    except Exception as e:
+        print(f"배치 재순위화 오류, 문서별 채점으로 대체: {e}")
+        return score_llm_per_doc(question, docs)
+    return _batch_scores(result, len(docs))
+
+
+# =========================
+# 로컬 어휘 백엔드 (LLM 호출 없음)
+# =========================
+
+def score_lexical(question: str, docs: List[Document]) -> List[float]:
+    """후보 문서에 대한 문자 n-gram BM25 점수 (최고점 기준 0~1 정규화)"""
+    raw = BM25Index([doc.page_content for doc in docs]).scores(question)
+    top = max(raw, default=0.0)
+    return [s / top for s in raw] if top > 0 else raw
+
+
+# =========================
+# 백엔드 선택
+# =========================
+
+RERANKERS: Dict[str, Reranker] = {
+    "llm_batch": score_llm_batch,
+    "llm_per_doc": score_llm_per_doc,
+    "lexical": score_lexical,
+}
+
+
+def get_reranker(name: str = "") -> Reranker:
+    """
+    재순위화 백엔드를 반환
+
+    Args:
+        name (str): 백엔드 이름 (비우면 RERANK_BACKEND 환경변수, 기본값 "llm_batch")
+            - "llm_batch": 한 번의 구조화 출력 호출로 전체 후보 채점
+            - "llm_per_doc": 문서마다 LLM 호출
+            - "lexical": 로컬 BM25 채점 (네트워크 호출 없음)
+    """
+    backend = name or os.getenv("RERANK_BACKEND", "llm_batch")
+    return RERANKERS.get(backend, RERANKERS["llm_batch"])
+
+
+# =========================
+# 비동기 백엔드 (동시 호출)
+# =========================
+
+async def ascore_llm_per_doc(
+    question: str,
+    docs: List[Document],
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> List[Optional[float]]:
+    """
+    문서별 채점 호출을 asyncio.gather로 동시에 실행
+
+    Args:
+        concurrency: 동시에 진행할 최대 호출 수 (기본값: RERANK_CONCURRENCY, 8)
+        timeout: 호출당 제한 시간(초) (기본값: RERANK_TIMEOUT, 10)
+
+    Returns:
+        List[Optional[float]]: 문서별 점수, 실패/시간 초과된 문서는 None
+    """
+    concurrency = concurrency or int(os.getenv("RERANK_CONCURRENCY", "8"))
+    timeout = timeout or float(os.getenv("RERANK_TIMEOUT", "10"))
+    llm = get_llm("gen")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _score(doc: Document) -> Optional[float]:
+        async with semaphore:
+            try:
+                msg = await asyncio.wait_for(llm.ainvoke(_per_doc_prompt(question, doc)), timeout)
+                return _parse_score(msg.content)
+            except Exception as e:
+                print(f"문서 채점 실패, 벡터 유사도 순서 유지: {type(e).__name__} {e}")
+                return None
+
+    return list(await asyncio.gather(*(_score(doc) for doc in docs)))
+
+
+async def ascore_llm_batch(question: str, docs: List[Document]) -> List[Optional[float]]:
+    """
+    배치 채점을 비동기로 실행
+    시간 초과 시 모든 문서를 None(벡터 유사도 순서 유지)으로 반환하고,
+    파싱/API 오류일 때만 문서별 동시 채점으로 대체합니다. (시간 초과가 두 번 쌓이지 않도록)
+    """
+    timeout = float(os.getenv("RERANK_TIMEOUT", "10"))
+    try:
+        structured_llm = get_llm("gen").with_structured_output(RerankBatch)
+        result: RerankBatch = await asyncio.wait_for(
+            structured_llm.ainvoke(_batch_prompt(question, docs)), timeout
+        )
+        return list(_batch_scores(result, len(docs)))
+    except asyncio.TimeoutError:
+        print(f"배치 재순위화 시간 초과({timeout}s), 벡터 유사도 순서 유지")
+        return [None] * len(docs)
+    except Exception as e:
+        print(f"배치 재순위화 오류, 문서별 동시 채점으로 대체: {type(e).__name__} {e}")
+        return await ascore_llm_per_doc(question, docs)
+
+
+async def ascore_lexical(question: str, docs: List[Document]) -> List[Optional[float]]:
+    return list(score_lexical(question, docs))
+
+
+ASYNC_RERANKERS: Dict[str, AsyncReranker] = {
+    "llm_batch": ascore_llm_batch,
+    "llm_per_doc": ascore_llm_per_doc,
+    "lexical": ascore_lexical,
+}
+
+
+def get_async_reranker(name: str = "") -> AsyncReranker:
+    """RERANK_BACKEND에 대응하는 비동기 재순위화 백엔드를 반환"""
+    backend = name or os.getenv("RERANK_BACKEND", "llm_batch")
+    return ASYNC_RERANKERS.get(backend, ASYNC_RERANKERS["llm_batch"])
+
+
+def order_by_scores(docs: List[Document], scores: List[Optional[float]]) -> List[Document]:
+    """
+    점수 내림차순으로 문서를 정렬
+    점수가 없는(실패한) 문서는 원래 벡터 유사도 순위 자리를 그대로 유지합니다.
+    """
+    scored = sorted(
+        (pair for pair in zip(docs, scores) if pair[1] is not None),
+        key=lambda x: x[1],
+        reverse=True,
+    )
+    ranked = iter(doc for doc, _ in scored)
+    return [doc if score is None else next(ranked) for doc, score in zip(docs, scores)]
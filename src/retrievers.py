@@ -0,0 +1,173 @@
+# retrievers.py
+
+import os
+import json
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+import selection
+from lexical import BM25Index
+from scripts.local_vectorstore import matches_filter
+from scripts.create_pinecone_index import check_corpus_version, get_vectorstore, load_chunks, register_invalidation_hook
+
+# =========================
+# 리트리버 레지스트리
+# =========================
+# (인덱스 이름, 검색 모드, 검색 파라미터)별 retriever를 한 번만 만들어 재사용합니다.
+# - 적중 시 잠금/로그 없이 dict 조회만 수행 (검색 호출 외 오버헤드 최소화)
+# - 문서가 갱신되면(무효화 콜백) 레지스트리를 비우고, 다음 호출 때 새 live 별칭으로 다시 생성
+# - warm_up_retrievers(): 서버 시작 시 retriever 생성 + 예열 쿼리로 인덱스 연결/임베딩 클라이언트 준비
+
+INDEX_NAME = "gaida-hr-rules"
+DEFAULT_SEARCH_KWARGS: Dict[str, Any] = {"k": 3}
+WARMUP_QUERY = "연차 휴가"
+
+_REGISTRY: Dict[Tuple[str, str, str], BaseRetriever] = {}
+_BUILD_LOCK = threading.Lock()
+
+
+def retrieval_mode() -> str:
+    """RETRIEVAL_MODE: "dense"(기본, 벡터 검색) | "hybrid"(BM25 + 벡터 검색, RRF 결합)"""
+    return os.getenv("RETRIEVAL_MODE", "dense")
+
+
+def _key(index_name: str, search_kwargs: Dict[str, Any]) -> Tuple[str, str, str]:
+    # filter 같은 dict 값도 키로 쓸 수 있도록 정렬된 JSON 문자열로 변환
+    return index_name, retrieval_mode(), json.dumps(search_kwargs, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _lookup(index_name: str, search_kwargs: Dict[str, Any]) -> Optional[BaseRetriever]:
+    check_corpus_version(index_name)  # 다른 프로세스의 문서 갱신 감지 (주기 내에는 시각 비교만)
+    return _REGISTRY.get(_key(index_name, search_kwargs))
+
+
+# =========================
+# 하이브리드 검색 (BM25 + 벡터, Reciprocal Rank Fusion)
+# =========================
+# "병가", "월차", "가족돌봄휴가"처럼 정확한 용어가 중요한 질문은 벡터 검색만으로는 순위가 밀릴 수 있어
+# 인덱스와 같은 청크로 만든 BM25(문자 n-gram) 결과와 벡터 검색 결과를 순위 기반으로 합칩니다.
+# RRF 점수 = Σ 1 / (HYBRID_RRF_K + 순위), 각 검색기는 HYBRID_FETCH_K개 후보를 가져옵니다.
+
+def _doc_key(doc: Document) -> str:
+    return doc.id or f"{doc.metadata.get('source', '')}\0{doc.page_content}"
+
+
+def rrf_fuse(rankings: List[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """여러 검색 결과 목록을 Reciprocal Rank Fusion으로 합쳐 상위 k개 반환"""
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = _doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [docs[key] for key in ranked]
+
+
+class HybridRetriever(BaseRetriever):
+    """벡터 retriever + 로컬 BM25 역색인을 RRF로 결합하는 retriever"""
+
+    dense: BaseRetriever
+    bm25: Any
+    chunks: List[Document]
+    k: int = 3
+    fetch_k: int = 10
+    rrf_k: int = 60
+    allowed: Optional[List[int]] = None  # 메타데이터 필터에 맞는 청크 번호 (None이면 전체)
+
+    def _lexical(self, query: str) -> List[Document]:
+        if self.allowed is None:
+            ranked = self.bm25.top_k(query, self.fetch_k)
+        else:
+            scores = self.bm25.scores(query)
+            ranked = sorted(((i, scores[i]) for i in self.allowed if scores[i] > 0), key=lambda x: x[1], reverse=True)
+        return [self.chunks[i] for i, _ in ranked[:self.fetch_k]]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        dense = self.dense.invoke(query, config={"callbacks": run_manager.get_child()})
+        return rrf_fuse([dense, self._lexical(query)], self.k, self.rrf_k)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        dense = await self.dense.ainvoke(query, config={"callbacks": run_manager.get_child()})
+        return rrf_fuse([dense, self._lexical(query)], self.k, self.rrf_k)
+
+
+def _build_retriever(index_name: str, search_kwargs: Dict[str, Any]) -> BaseRetriever:
+    vectorstore = get_vectorstore(index_name=index_name)
+    if retrieval_mode() != "hybrid":
+        return vectorstore.as_retriever(search_kwargs=search_kwargs)
+
+    k = int(search_kwargs.get("k", DEFAULT_SEARCH_KWARGS["k"]))
+    fetch_k = max(k, int(os.getenv("HYBRID_FETCH_K", "10")))
+    chunks = load_chunks()
+    metadata_filter = search_kwargs.get("filter")
+    allowed = [i for i, doc in enumerate(chunks) if matches_filter(doc.metadata, metadata_filter)] if metadata_filter else None
+    return HybridRetriever(
+        dense=vectorstore.as_retriever(search_kwargs={**search_kwargs, "k": fetch_k}),
+        bm25=BM25Index([doc.page_content for doc in chunks]),
+        chunks=chunks,
+        k=k,
+        fetch_k=fetch_k,
+        rrf_k=int(os.getenv("HYBRID_RRF_K", "60")),
+        allowed=allowed,
+    )
+
+
+def get_retriever(index_name: str = INDEX_NAME, **search_kwargs: Any) -> BaseRetriever:
+    """(인덱스, 검색 모드, 검색 파라미터)별 retriever (없으면 생성 후 등록)"""
+    search_kwargs = search_kwargs or dict(DEFAULT_SEARCH_KWARGS)
+    retriever = _lookup(index_name, search_kwargs)
+    if retriever is not None:
+        return retriever
+    with _BUILD_LOCK:
+        key = _key(index_name, search_kwargs)
+        retriever = _REGISTRY.get(key)
+        if retriever is None:
+            retriever = _build_retriever(index_name, search_kwargs)
+            _REGISTRY[key] = retriever
+        return retriever
+
+
+async def aget_retriever(index_name: str = INDEX_NAME, **search_kwargs: Any) -> BaseRetriever:
+    """get_retriever의 비동기 버전 (처음 생성할 때만 인덱스 연결을 스레드에서 수행)"""
+    retriever = _lookup(index_name, search_kwargs or dict(DEFAULT_SEARCH_KWARGS))
+    if retriever is not None:
+        return retriever
+    return await asyncio.to_thread(get_retriever, index_name, **search_kwargs)
+
+
+def clear_retrievers() -> None:
+    _REGISTRY.clear()
+
+
+def warm_up_retrievers(
+    index_name: str = INDEX_NAME, search_kwargs_list: Optional[List[Dict[str, Any]]] = None
+) -> None:
+    """retriever를 미리 만들고 예열 쿼리를 한 번 실행 (실패해도 서비스는 계속, 첫 요청 때 다시 시도)"""
+    default_kwargs = {"k": selection.fetch_k()} if selection.budget_enabled() else DEFAULT_SEARCH_KWARGS
+    for search_kwargs in search_kwargs_list or [default_kwargs]:
+        try:
+            get_retriever(index_name, **search_kwargs).invoke(WARMUP_QUERY)
+        except Exception as e:
+            print(f"리트리버 예열 실패 ({index_name}, {search_kwargs}): {e}")
+
+
+def start_warm_up() -> Optional[threading.Thread]:
+    """RETRIEVER_WARMUP=1(기본)이면 백그라운드 스레드에서 예열 (서버 시작을 막지 않음)"""
+    if os.getenv("RETRIEVER_WARMUP", "1") != "1":
+        return None
+    thread = threading.Thread(target=warm_up_retrievers, name="retriever-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+# 문서 갱신(재업로드, 블루/그린 전환, 다른 프로세스의 코퍼스 버전 변경) 시 레지스트리 비우기
+register_invalidation_hook(clear_retrievers)
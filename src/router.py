@@ -14,6 +14,15 @@ def route_after_hr(state: State) -> str:
     return "router2" if state["is_hr_question"] else "reject"
 
 
+# =========================
+# 답변 캐시 라우터
+# =========================
+
+def route_after_cache(state: State) -> Literal["hit", "miss"]:
+    """캐시 적중 시 바로 종료, 아니면 라우팅 진행"""
+    return "hit" if state.get("cache_hit") else "miss"
+
+
 # =========================
 # 2차 라우터: RAG vs Department
 # =========================
@@ -23,4 +32,17 @@ def route_after_rag(state: State) -> Literal["rag", "department"]:
     if state.get('is_rag_suitable'):
         return "rag"
     else:
-        return "department"
\ No newline at end of file
+        return "department"
+
+
+# =========================
+# 통합 프런트 도어 라우터
+# =========================
+
+def route_after_front_door(state: State) -> Literal["hit", "reject", "rag", "department"]:
+    """캐시 적중 여부와 통합 분류 결과(HR 여부 + RAG/부서)로 다음 노드 결정"""
+    if state.get("cache_hit"):
+        return "hit"
+    if not state.get("is_hr_question"):
+        return "reject"
+    return route_after_rag(state)
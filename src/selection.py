@@ -0,0 +1,134 @@
+# selection.py
+
+import math
+import os
+import threading
+from typing import Dict, List, Optional, Set
+
+from langchain_core.documents import Document
+
+from lexical import char_ngrams
+
+# =========================
+# 컨텍스트 선택 (적응형 k + MMR + 토큰 예산)
+# =========================
+# 고정 k=3 대신 후보를 넉넉히 가져와 재순위화한 뒤, 아래 기준으로 프롬프트에 넣을 청크를 고릅니다.
+# - 점수 하한: 재순위화 점수가 CONTEXT_MIN_SCORE 미만인 청크는 제외 (최고점 청크 1개는 항상 유지)
+# - MMR: 관련도와 이미 고른 청크와의 중복도(문자 bigram 겹침)를 함께 고려해 순서를 정하고,
+#        중복도가 CONTEXT_DUP_THRESHOLD 이상이면(chunk_overlap으로 겹친 청크 등) 제외
+# - 토큰 예산: 고른 청크의 tiktoken 토큰 수 합이 CONTEXT_TOKEN_BUDGET을 넘지 않도록 채움
+#
+# CONTEXT_SELECTION: "fixed"(기본, 기존 k=3) | "budget"
+# CONTEXT_FETCH_K: budget 모드에서 검색/재순위화할 후보 수 (기본 8)
+# CONTEXT_TOKEN_BUDGET: 출처 문서에 쓸 최대 토큰 수 (기본 1500)
+# CONTEXT_MIN_SCORE: 재순위화 점수 하한 (기본 0.3)
+# CONTEXT_MMR_LAMBDA: 관련도 가중치 (1이면 관련도만, 기본 0.7)
+# CONTEXT_DUP_THRESHOLD: 중복으로 보고 제외할 겹침 비율 (기본 0.8)
+
+_ENCODING = None
+_ENCODING_LOCK = threading.Lock()
+_STATS_LOCK = threading.Lock()
+_STATS: Dict[str, int] = {"calls": 0, "candidates": 0, "selected": 0, "tokens": 0, "low_score": 0, "duplicate": 0, "over_budget": 0}
+
+
+def budget_enabled() -> bool:
+    return os.getenv("CONTEXT_SELECTION", "fixed") == "budget"
+
+
+def fetch_k() -> int:
+    return int(os.getenv("CONTEXT_FETCH_K", "8"))
+
+
+def _get_encoding():
+    """답변 모델의 tiktoken 인코딩 (인코딩 파일을 받을 수 없으면 False -> 글자 수 기반 추정)"""
+    global _ENCODING
+    if _ENCODING is not None:
+        return _ENCODING
+    with _ENCODING_LOCK:
+        if _ENCODING is None:
+            import tiktoken
+            try:
+                try:
+                    _ENCODING = tiktoken.encoding_for_model(os.getenv("GEN_LLM", "gpt-4.1"))
+                except KeyError:
+                    _ENCODING = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                print(f"tiktoken 인코딩 로드 실패, 글자 수로 토큰 수를 추정합니다: {e}")
+                _ENCODING = False
+        return _ENCODING
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text or ""))
+    return math.ceil(len(text or "") / 1.5)  # 한국어는 대략 1.5자당 1토큰 (넉넉하게 추정)
+
+
+def _overlap(a: Set[str], b: Set[str]) -> float:
+    """두 청크의 bigram 겹침 비율 (작은 쪽 기준: 한 청크가 다른 청크에 거의 포함되면 1에 가까움)"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def select_docs(docs: List[Document], scores: List[Optional[float]], budget: Optional[int] = None) -> List[Document]:
+    """
+    재순위화 점수를 받아 MMR 순서로 토큰 예산 안의 청크를 선택
+
+    Args:
+        docs: 검색된 후보 문서 (벡터 유사도 순)
+        scores: 문서별 0~1 점수, 채점에 실패한 문서는 None (하한 점수로 간주)
+        budget: 최대 토큰 수 (기본값: CONTEXT_TOKEN_BUDGET)
+    """
+    if not docs:
+        return []
+    budget = budget or int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+    min_score = float(os.getenv("CONTEXT_MIN_SCORE", "0.3"))
+    lam = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))
+    dup_threshold = float(os.getenv("CONTEXT_DUP_THRESHOLD", "0.8"))
+
+    relevance = [min_score if s is None else s for s in scores]
+    best = max(range(len(docs)), key=lambda i: relevance[i])
+    candidates = [i for i in range(len(docs)) if i == best or relevance[i] >= min_score]
+    low_score = len(docs) - len(candidates)
+    grams = {i: set(char_ngrams(docs[i].page_content)) for i in candidates}
+
+    selected: List[int] = []
+    used = duplicate = over_budget = 0
+    while candidates:
+        def _mmr(i: int) -> float:
+            redundancy = max((_overlap(grams[i], grams[j]) for j in selected), default=0.0)
+            return lam * relevance[i] - (1 - lam) * redundancy
+
+        i = max(candidates, key=_mmr)
+        candidates.remove(i)
+        if selected and max(_overlap(grams[i], grams[j]) for j in selected) >= dup_threshold:
+            duplicate += 1
+            continue
+        tokens = count_tokens(docs[i].page_content)
+        if selected and used + tokens > budget:
+            over_budget += 1  # 더 짧은 다음 후보는 들어갈 수 있으므로 계속 진행
+            continue
+        selected.append(i)
+        used += tokens
+
+    with _STATS_LOCK:
+        _STATS["calls"] += 1
+        _STATS["candidates"] += len(docs)
+        _STATS["selected"] += len(selected)
+        _STATS["tokens"] += used
+        _STATS["low_score"] += low_score
+        _STATS["duplicate"] += duplicate
+        _STATS["over_budget"] += over_budget
+    return [docs[i] for i in selected]
+
+
+def get_selection_stats() -> Dict[str, float]:
+    """선택 호출 수, 제외 사유별 청크 수, 호출당 평균 청크/토큰 수"""
+    with _STATS_LOCK:
+        stats: Dict[str, float] = dict(_STATS)
+    calls = stats["calls"]
+    stats["avg_selected"] = stats["selected"] / calls if calls else 0.0
+    stats["avg_tokens"] = stats["tokens"] / calls if calls else 0.0
+    return stats
@@ -0,0 +1,129 @@
+# speculation.py
+
+import os
+import time
+import uuid
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# =========================
+# 추측 실행 (라우팅과 병렬로 검색 선행)
+# =========================
+# 라우터 LLM이 도는 동안 검색을 미리 시작하고, 결과는 id로 보관합니다.
+# Future는 체크포인트에 직렬화할 수 없으므로 상태에는 id만 저장합니다.
+
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SPECULATIVE_WORKERS", "8")),
+    thread_name_prefix="speculative",
+)
+_PENDING: Dict[str, Tuple[Future, float]] = {}
+_LOCK = threading.Lock()
+_STALE_SECONDS = 300.0
+
+_STATS: Dict[str, float] = {
+    "launched": 0,        # 시작된 추측 검색 수
+    "used": 0,            # RAG 경로에서 결과를 사용한 수
+    "wasted": 0,          # 거절/담당자 안내로 버려진 수
+    "failed": 0,          # 검색 중 오류로 사용하지 못한 수
+    "wasted_seconds": 0.0,  # 버려진 검색에 소요된 시간 합계
+}
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _record_waste(future: Future) -> None:
+    """버려진 추측 검색의 소요 시간을 집계 (아직 실행 중이면 완료 시 집계)"""
+    def _on_done(f: Future) -> None:
+        if f.cancelled() or f.exception() is not None:
+            return
+        with _LOCK:
+            _STATS["wasted_seconds"] += f.result()[1]
+
+    if not future.cancel():
+        future.add_done_callback(_on_done)
+
+
+def _purge_stale() -> None:
+    """claim/discard 되지 않고 남은 오래된 항목을 낭비로 처리 (lock 안에서 호출)"""
+    now = time.monotonic()
+    for spec_id in [k for k, (_, started) in _PENDING.items() if now - started > _STALE_SECONDS]:
+        future, _ = _PENDING.pop(spec_id)
+        _STATS["wasted"] += 1
+        _record_waste(future)
+
+
+def launch(fn: Callable[..., Any], *args: Any) -> str:
+    """fn(*args)를 백그라운드에서 시작하고 결과를 찾을 id를 반환"""
+    spec_id = uuid.uuid4().hex
+    future = _EXECUTOR.submit(_timed, fn, *args)
+    with _LOCK:
+        _purge_stale()
+        _PENDING[spec_id] = (future, time.monotonic())
+        _STATS["launched"] += 1
+    return spec_id
+
+
+def _pop(spec_id: str) -> Optional[Future]:
+    with _LOCK:
+        entry = _PENDING.pop(spec_id, None)
+    return entry[0] if entry else None
+
+
+def claim(spec_id: str) -> Optional[Any]:
+    """추측 실행 결과를 가져옴 (없거나 실패하면 None → 호출 측에서 직접 실행)"""
+    future = _pop(spec_id) if spec_id else None
+    if future is None:
+        return None
+    try:
+        result, _ = future.result()
+    except Exception as e:
+        print(f"추측 검색 실패, 다시 검색합니다: {e}")
+        with _LOCK:
+            _STATS["failed"] += 1
+        return None
+    with _LOCK:
+        _STATS["used"] += 1
+    return result
+
+
+async def aclaim(spec_id: str) -> Optional[Any]:
+    """claim의 비동기 버전 (이벤트 루프를 막지 않고 완료를 기다림)"""
+    future = _pop(spec_id) if spec_id else None
+    if future is None:
+        return None
+    try:
+        result, _ = await asyncio.wrap_future(future)
+    except Exception as e:
+        print(f"추측 검색 실패, 다시 검색합니다: {e}")
+        with _LOCK:
+            _STATS["failed"] += 1
+        return None
+    with _LOCK:
+        _STATS["used"] += 1
+    return result
+
+
+def discard(spec_id: str) -> None:
+    """결과가 필요 없어진 추측 실행을 버림 (시작 전이면 취소)"""
+    future = _pop(spec_id) if spec_id else None
+    if future is None:
+        return
+    with _LOCK:
+        _STATS["wasted"] += 1
+    _record_waste(future)
+
+
+def get_speculation_stats() -> Dict[str, float]:
+    """추측 검색 사용/낭비 통계"""
+    with _LOCK:
+        stats = dict(_STATS)
+        stats["pending"] = len(_PENDING)
+    finished = stats["used"] + stats["wasted"] + stats["failed"]
+    stats["waste_rate"] = stats["wasted"] / finished if finished else 0.0
+    return stats
@@ -1,5 +1,5 @@
 # state.py
-from typing import Literal, Optional, Dict, List
+from typing import Any, Literal, Optional, Dict, List
 from langgraph.graph import MessagesState
 from langchain_core.documents import Document
 
@@ -19,11 +19,18 @@ class State(MessagesState, total=False):
     # === 담당자 안내 정보 ===
     department_info: Optional[Dict[str, str]]   # 담당 부서 연락처 {"name": "부서명", "email": "이메일", "phone": "전화번호", "slack": "슬랙채널"}
     
+    # === 답변 캐시 ===
+    cache_hit: bool                             # True: 캐시된 답변으로 응답 (검색/생성/검증 생략)
+
     # === RAG 처리 ===
     retrieved_docs: List[Document]              # 벡터DB에서 검색된 관련 문서들 (Top-K)
+    speculation_id: str                         # 라우팅과 병렬로 시작한 추측 검색 id (speculative 모드)
+    rag_context: str                            # 겹치는 청크를 합친 출처 문서 문자열 (답변 생성·검증 공용)
 
     # === 답변 검증 ===
-    verification: str                           # 답변 품질 검증 결과
+    verification: str                           # 답변 품질 검증 결과 ("일치함" | "불일치함" | "pending" | "skipped")
+    verification_id: str                        # 백그라운드 검증 결과 조회 id (VERIFY_MODE=background)
+    verification_evidence: List[Dict[str, Any]]  # 문장별 근거 검사 결과 (VERIFY_BACKEND=local)
         
     # === 최종 답변 통합 관리 ===
     answer_type: Literal[                       # 답변 유형 구분
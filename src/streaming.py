@@ -0,0 +1,105 @@
+# streaming.py
+
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from langchain_core.messages import AIMessageChunk
+
+# =========================
+# 답변 토큰 스트리밍
+# =========================
+# LangGraph의 stream_mode=["messages", "updates"]를 사용합니다.
+# - messages: 노드 안에서 호출한 LLM 토큰 (generate_rag_answer 노드의 토큰만 사용자에게 전달)
+# - updates: 노드별 상태 업데이트 (토큰 없이 끝나는 답변, 검증 결과를 후행 이벤트로 전달)
+#
+# LangGraph 서버를 직접 쓰는 클라이언트도 같은 방식으로
+# metadata["langgraph_node"] == "generate_rag_answer" 인 messages 이벤트만 골라 쓰면 됩니다.
+
+STREAM_MODES = ["messages", "updates"]
+ANSWER_NODE = "generate_rag_answer"
+VERIFY_NODE = "verify_rag_answer"
+# final_answer를 만드는 노드 (라우터 노드는 이전 턴의 상태를 그대로 돌려주므로 제외)
+FINAL_ANSWER_NODES = {ANSWER_NODE, "generate_reject_answer", "generate_contact_answer", "lookup_answer_cache"}
+
+
+class _StreamTracker:
+    """스트림 이벤트를 클라이언트용 이벤트로 변환하고 TTFT/전체 지연을 기록"""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.ttft: Optional[float] = None
+        self.answer_sent = False
+        self.department_info: Optional[Dict[str, str]] = None  # 2차 라우터가 고른 담당 부서
+        self.answer_type: Optional[str] = None  # 라우터가 정한 답변 유형 (답변 노드 업데이트에 없을 때 사용)
+
+    def handle(self, mode: str, payload: Any) -> Iterator[Dict[str, Any]]:
+        if mode == "messages":
+            chunk, metadata = payload
+            if (
+                isinstance(chunk, AIMessageChunk)
+                and metadata.get("langgraph_node") == ANSWER_NODE
+                and chunk.content
+            ):
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - self.start
+                yield {"event": "token", "content": chunk.content}
+            return
+
+        for node, update in (payload or {}).items():
+            if not isinstance(update, dict):
+                continue
+            if "department_info" in update:
+                self.department_info = update["department_info"]
+            if update.get("answer_type"):
+                self.answer_type = update["answer_type"]
+            if node in FINAL_ANSWER_NODES and update.get("final_answer") and not self.answer_sent:
+                # 캐시 적중·거절·담당자 안내처럼 토큰 없이 끝나는 답변도 한 번에 전달
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - self.start
+                self.answer_sent = True
+                yield {
+                    "event": "answer",
+                    "node": node,
+                    "final_answer": update["final_answer"],
+                    "answer_type": "rag_answer" if node == ANSWER_NODE else self.answer_type,
+                    "department_info": self.department_info,
+                }
+            if node == VERIFY_NODE and "verification" in update:
+                yield {"event": "verification", "verification": update["verification"]}
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "event": "metrics",
+            "ttft": self.ttft,
+            "total": time.perf_counter() - self.start,
+        }
+
+
+def _inputs(question: str) -> Dict[str, Any]:
+    return {"messages": [{"role": "user", "content": question}]}
+
+
+def stream_answer(graph, question: str, config: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    동기 그래프로 답변을 스트리밍
+
+    Yields:
+        {"event": "token", "content"}: 답변 토큰
+        {"event": "answer", "final_answer", "answer_type", "department_info"}: 최종 답변 (생성 완료 시점)
+        {"event": "verification", "verification"}: 후행 검증 결과
+        {"event": "metrics", "ttft", "total"}: 첫 토큰까지 시간 / 전체 지연 (초)
+    """
+    tracker = _StreamTracker()
+    for mode, payload in graph.stream(_inputs(question), config, stream_mode=STREAM_MODES):
+        yield from tracker.handle(mode, payload)
+    yield tracker.metrics()
+
+
+async def astream_answer(graph, question: str, config: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """stream_answer의 비동기 버전 (async_graph 권장)"""
+    tracker = _StreamTracker()
+    async for mode, payload in graph.astream(_inputs(question), config, stream_mode=STREAM_MODES):
+        for event in tracker.handle(mode, payload):
+            yield event
+    yield tracker.metrics()
+
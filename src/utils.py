@@ -1,49 +1,212 @@
 import os
+import asyncio
+import threading
+import importlib.util
+from typing import Dict, Tuple, Optional
+
+import httpx
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# =========================
+# 공유 HTTP 커넥션 풀
+# =========================
+# 모든 LLM 클라이언트가 하나의 httpx 풀을 공유하여 keep-alive 커넥션과 TLS 세션을 재사용합니다.
+# 비동기 커넥션은 만들어진 이벤트 루프에 묶이므로, 비동기 풀은 실행 중인 루프마다 따로 둡니다.
+# (asyncio.run()을 여러 번 호출해도 닫힌 루프의 커넥션을 재사용하다 "Event loop is closed"가 나지 않음)
+_HTTP_LOCK = threading.Lock()
+_HTTP_CLIENT: Optional[httpx.Client] = None
+_HTTP_ASYNC_CLIENT: Optional[httpx.AsyncClient] = None
+_STATS_LOCK = threading.Lock()
+
+# 풀 사용 통계 (LLM 인스턴스 재사용 + 실제 TCP 커넥션 재사용)
+_POOL_STATS: Dict[str, int] = {
+    "llm_hits": 0,             # 레지스트리에서 기존 ChatOpenAI 인스턴스를 재사용한 횟수
+    "llm_misses": 0,           # 새 ChatOpenAI 인스턴스를 생성한 횟수
+    "requests": 0,             # 풀을 통해 전송된 HTTP 요청 수
+    "connections_opened": 0,   # 새로 연결된 TCP 커넥션 수 (풀 미스)
+}
+
+
+def _http2_enabled() -> bool:
+    """HTTP/2 사용 여부 (h2 패키지가 없으면 HTTP/1.1 keep-alive로 동작)"""
+    if os.getenv("LLM_HTTP2", "1") != "1":
+        return False
+    return importlib.util.find_spec("h2") is not None
+
+
+def _pool_limits() -> httpx.Limits:
+    """호스트당 커넥션 수와 keep-alive 유지 시간을 환경변수로 조정"""
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60")),
+    )
+
+
+def _pool_timeout() -> httpx.Timeout:
+    return httpx.Timeout(float(os.getenv("LLM_HTTP_TIMEOUT", "60")), connect=10.0)
+
+
+def _count_trace(event_name: str, info: dict) -> None:
+    # httpcore trace 이벤트: 새 커넥션이 열릴 때만 connect_tcp 이벤트가 발생합니다.
+    if event_name == "connection.connect_tcp.started":
+        with _STATS_LOCK:
+            _POOL_STATS["connections_opened"] += 1
+
+
+async def _acount_trace(event_name: str, info: dict) -> None:
+    _count_trace(event_name, info)
+
+
+def _on_request(request: httpx.Request) -> None:
+    with _STATS_LOCK:
+        _POOL_STATS["requests"] += 1
+    request.extensions["trace"] = _count_trace
+
+
+async def _aon_request(request: httpx.Request) -> None:
+    with _STATS_LOCK:
+        _POOL_STATS["requests"] += 1
+    request.extensions["trace"] = _acount_trace
+
+
+class _LoopLocalTransport(httpx.AsyncBaseTransport):
+    """실행 중인 이벤트 루프별로 커넥션 풀(AsyncHTTPTransport)을 지연 생성하여 요청을 전달"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._transports: Dict[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport] = {}
+
+    def _current(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                # 닫힌 루프의 커넥션은 더 이상 닫을 수 없으므로 참조만 버림
+                for closed in [lp for lp in self._transports if lp.is_closed()]:
+                    del self._transports[closed]
+                transport = httpx.AsyncHTTPTransport(http2=_http2_enabled(), limits=_pool_limits())
+                self._transports[loop] = transport
+            return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._current().handle_async_request(request)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+def _get_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """프로세스 전역에서 공유하는 동기/비동기 httpx 클라이언트를 반환"""
+    global _HTTP_CLIENT, _HTTP_ASYNC_CLIENT
+    with _HTTP_LOCK:
+        if _HTTP_CLIENT is None:
+            _HTTP_CLIENT = httpx.Client(
+                http2=_http2_enabled(),
+                limits=_pool_limits(),
+                timeout=_pool_timeout(),
+                event_hooks={"request": [_on_request]},
+            )
+        if _HTTP_ASYNC_CLIENT is None:
+            _HTTP_ASYNC_CLIENT = httpx.AsyncClient(
+                transport=_LoopLocalTransport(),  # HTTP/2·풀 크기 설정은 루프별 transport에 적용
+                timeout=_pool_timeout(),
+                event_hooks={"request": [_aon_request]},
+            )
+        return _HTTP_CLIENT, _HTTP_ASYNC_CLIENT
+
+
+def get_llm_pool_stats() -> Dict[str, float]:
+    """
+    LLM 레지스트리와 HTTP 커넥션 풀의 재사용 통계를 반환
+
+    Returns:
+        Dict[str, float]: llm_hits / llm_misses / requests / connections_opened,
+            connections_reused(= requests - connections_opened) 및 각 적중률
+    """
+    with _STATS_LOCK:
+        stats: Dict[str, float] = dict(_POOL_STATS)
+    lookups = stats["llm_hits"] + stats["llm_misses"]
+    stats["llm_hit_rate"] = stats["llm_hits"] / lookups if lookups else 0.0
+    stats["connections_reused"] = max(0, stats["requests"] - stats["connections_opened"])
+    stats["connection_reuse_rate"] = (
+        stats["connections_reused"] / stats["requests"] if stats["requests"] else 0.0
+    )
+    return stats
+
+
 # =========================
 # LLM 모델 호출
 # =========================
+# (role, model)별 ChatOpenAI 인스턴스 레지스트리
+_LLM_REGISTRY: Dict[Tuple[str, str], ChatOpenAI] = {}
+_LLM_LOCK = threading.Lock()
+
+
 def get_llm(role: str = "gen") -> ChatOpenAI:
     """
     노드별로 적합한 LLM 모델을 반환하는 팩토리 함수
-    
+    (role, model)별로 한 번만 생성하여 프로세스 전역에서 재사용합니다.
+
     Args:
         role (str): 역할별 모델 선택
             - "gen": 본문 생성/분석
             - "router1": 1차 라우터
-            - "router2": 2차 라우터 
-    
+            - "router2": 2차 라우터
+            - "front_door": 정제 + 1·2차 라우팅 통합 노드
+
     Returns:
-        ChatOpenAI: 설정된 LLM 인스턴스
-        
+        ChatOpenAI: 설정된 LLM 인스턴스 (공유 커넥션 풀 사용)
+
     Environment Variables:
         - OPENAI_API_KEY: OpenAI API 키 (필수)
+        - LLM_MAX_CONNECTIONS / LLM_MAX_KEEPALIVE / LLM_KEEPALIVE_EXPIRY / LLM_HTTP2: 커넥션 풀 설정
     """
     # API 키 확인
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("OPENAI_API_KEY가 환경변수에 설정되지 않았습니다.")
-    
+
     # 역할별 고정 모델 매핑 (실제 존재하는 OpenAI 모델)
     model_map = {
         "gen": os.getenv("GEN_LLM", "gpt-4.1"),
         "router1": os.getenv("ROUTER1_LLM", "gpt-4.1-nano"),
         "router2": os.getenv("ROUTER2_LLM", "gpt-4.1-nano"),
+        "front_door": os.getenv("FRONT_DOOR_LLM", "gpt-4.1-mini"),
     }
-    
+
     # 역할에 맞는 모델 선택 (기본값: gen)
     model_name = model_map.get(role, model_map["gen"])
-    
+    key = (role, model_name)
+
+    with _LLM_LOCK:
+        cached = _LLM_REGISTRY.get(key)
+    if cached is not None:
+        with _STATS_LOCK:
+            _POOL_STATS["llm_hits"] += 1
+        return cached
+
+    http_client, http_async_client = _get_http_clients()
     try:
-        return ChatOpenAI(
+        llm = ChatOpenAI(
             model=model_name,
             temperature=0,  # 일관된 응답을 위해 0으로 설정
-            api_key=api_key
+            api_key=api_key,
+            http_client=http_client,
+            http_async_client=http_async_client,
         )
     except Exception as e:
         raise RuntimeError(f"LLM 초기화 실패 (role: {role}, model: {model_name}): {str(e)}")
 
+    with _LLM_LOCK:
+        # 동시에 생성된 경우 먼저 등록된 인스턴스를 사용
+        llm = _LLM_REGISTRY.setdefault(key, llm)
+    with _STATS_LOCK:
+        _POOL_STATS["llm_misses"] += 1
+    return llm
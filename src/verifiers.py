@@ -0,0 +1,191 @@
+# verifiers.py
+
+import os
+import re
+import json
+import time
+import uuid
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.documents import Document
+from lexical import char_ngrams
+
+# =========================
+# 답변 검증 실행 방식
+# =========================
+# VERIFY_MODE
+#   - "sync"(기본): 그래프 안에서 검증 후 응답
+#   - "background": 검증을 백그라운드 워커에 넘기고 바로 응답 ("pending"), 결과는 사이드 스토어에 기록
+# VERIFY_SAMPLE_RATE: 검증할 트래픽 비율 (0~1, 기본 1.0) - 샘플링에서 빠진 요청은 "skipped"
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_LOCK = threading.Lock()
+_FILE_LOCK = threading.Lock()
+_RESULTS: Dict[str, Dict[str, Any]] = {}
+_MAX_RESULTS = 10000
+# 실행 위치(CWD)와 관계없이 프로젝트 루트의 .cache/ 사용
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def verify_mode() -> str:
+    return os.getenv("VERIFY_MODE", "sync")
+
+
+def verify_backend() -> str:
+    """VERIFY_BACKEND: "llm"(기본, gen 모델 판정) | "local"(로컬 근거 검사, 네트워크 호출 없음)"""
+    return os.getenv("VERIFY_BACKEND", "llm")
+
+
+def should_verify() -> bool:
+    """VERIFY_SAMPLE_RATE에 따라 이번 요청을 검증할지 결정"""
+    rate = float(os.getenv("VERIFY_SAMPLE_RATE", "1.0"))
+    return rate >= 1.0 or random.random() < rate
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=int(os.getenv("VERIFY_WORKERS", "4")),
+                thread_name_prefix="verify",
+            )
+        return _EXECUTOR
+
+
+def _store(record: Dict[str, Any]) -> None:
+    """검증 결과를 메모리와 JSONL 사이드 스토어(VERIFY_STORE_PATH)에 기록"""
+    with _LOCK:
+        _RESULTS[record["verification_id"]] = record
+        while len(_RESULTS) > _MAX_RESULTS:
+            _RESULTS.pop(next(iter(_RESULTS)))
+
+    # 파일 기록은 별도 잠금으로 (디스크 I/O가 결과 조회나 워커 풀 생성을 막지 않도록)
+    path = os.getenv("VERIFY_STORE_PATH", os.path.join(_PROJECT_ROOT, ".cache", "verifications.jsonl"))
+    if not path:
+        return
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    try:
+        with _FILE_LOCK:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+    except OSError as e:
+        print(f"검증 결과 저장 실패: {e}")
+
+
+def submit_background(verify: Callable[[Dict[str, Any]], Dict[str, Any]], snapshot: Dict[str, Any], thread_id: str = "") -> str:
+    """
+    검증 함수를 백그라운드 워커 풀에서 실행하고, 결과를 조회할 id를 반환
+
+    Args:
+        verify: 상태 스냅샷을 받아 {"verification": ...}를 반환하는 함수
+        snapshot: 검증에 필요한 상태 (retrieved_docs, final_answer 등)
+        thread_id: LangGraph 스레드 id (결과 추적용)
+    """
+    verification_id = uuid.uuid4().hex
+    submitted = time.time()
+
+    def _job() -> None:
+        record: Dict[str, Any] = {
+            "verification_id": verification_id,
+            "thread_id": thread_id,
+            "question": snapshot.get("refined_question", ""),
+            "submitted_at": submitted,
+        }
+        try:
+            record.update(verify(snapshot))
+        except Exception as e:
+            record.update({"verification": "error", "error": str(e)})
+        record["completed_at"] = time.time()
+        _store(record)
+
+    _get_executor().submit(_job)
+    return verification_id
+
+
+def get_verification(verification_id: str) -> Optional[Dict[str, Any]]:
+    """백그라운드 검증 결과 조회 (아직 끝나지 않았으면 None)"""
+    with _LOCK:
+        return _RESULTS.get(verification_id)
+
+
+# =========================
+# 로컬 근거 검사 (groundedness)
+# =========================
+# 답변을 문장 단위로 나누고, 각 문장의 수치 정보(15일, 300만원, 25일 ...)가 출처에 그대로 있는지와
+# 문자 n-gram 겹침 비율을 확인합니다. LLM 판정과 같은 "일치함"/"불일치함" 라벨을 반환합니다.
+
+_CITATION_RE = re.compile(r"\[\s*\d+(?:\s*[,~-]\s*\d+)*\s*\]")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?。])\s+|\n+")
+_NUMBER_RE = re.compile(
+    r"\d[\d,]*(?:\.\d+)?\s*(?:만\s*원|천\s*원|억\s*원|원|일|개월|년|시간|분|%|퍼센트|회|명|주|포인트|세|박|월)?"
+)
+_NO_EVIDENCE_PHRASE = "문서에 근거가 없어"
+
+
+def _compact(text: str) -> str:
+    """수치 비교용: 공백과 천 단위 쉼표 제거 ("300 만원" == "300만원", "1,000" == "1000")"""
+    return re.sub(r"(?<=\d),(?=\d)", "", re.sub(r"\s+", "", text))
+
+
+def _number_in(number: str, compact_source: str) -> bool:
+    """수치가 출처에 독립된 토큰으로 있는지 ("5일"은 "15일"에, "00만원"은 "300만원"에 매칭되지 않음)"""
+    tail = r"(?!\d)" if number[-1:].isdigit() else ""
+    # 소수점/쉼표는 앞이 숫자일 때만 경계가 아님 ("2.5"의 "5"는 제외, "다.15일"·"만원,1000원"은 허용)
+    return re.search(r"(?<!\d)(?<!\d[.,])" + re.escape(number) + tail, compact_source) is not None
+
+
+def _answer_sentences(answer: str) -> List[str]:
+    """출처 목록과 인용 번호를 제거한 답변 본문 문장"""
+    body = re.split(r"\n[^\n]*출처\s*목록", answer, maxsplit=1)[0]
+    body = re.sub(r"[ \t]+(?=[.!?])", "", _CITATION_RE.sub("", body))
+    sentences = []
+    for sentence in _SENTENCE_SPLIT_RE.split(body):
+        sentence = sentence.strip(" -*#>\t")
+        if len(re.sub(r"\W", "", sentence)) >= 5:
+            sentences.append(sentence)
+    return sentences
+
+
+def check_groundedness(answer: str, docs: List[Document]) -> Dict[str, Any]:
+    """
+    답변이 검색 문서에 근거했는지 로컬에서 검사
+
+    Returns:
+        {"verification": "일치함" | "불일치함", "verification_evidence": 문장별 근거 리스트}
+    """
+    threshold = float(os.getenv("VERIFY_NGRAM_THRESHOLD", "0.5"))
+    sources = [doc.page_content for doc in docs]
+    if not answer.strip() or not any(s.strip() for s in sources):
+        return {"verification": "불일치함", "verification_evidence": []}
+
+    compact_sources = [_compact(s) for s in sources]
+    source_grams = [set(char_ngrams(s)) for s in sources]
+
+    evidence: List[Dict[str, Any]] = []
+    for sentence in _answer_sentences(answer):
+        if _NO_EVIDENCE_PHRASE in sentence:
+            # "근거가 없다"는 답변은 주장 자체가 없으므로 검사 대상에서 제외
+            continue
+        grams = set(char_ngrams(sentence))
+        overlaps = [len(grams & sg) / len(grams) if grams else 0.0 for sg in source_grams]
+        best = max(range(len(sources)), key=lambda i: overlaps[i])
+        numbers = [_compact(m.group()) for m in _NUMBER_RE.finditer(sentence)]
+        missing = [n for n in numbers if not any(_number_in(n, cs) for cs in compact_sources)]
+        evidence.append({
+            "sentence": sentence,
+            "overlap": round(overlaps[best], 3),
+            "source_index": best,
+            "numbers": numbers,
+            "missing_numbers": missing,
+            "grounded": overlaps[best] >= threshold and not missing,
+        })
+
+    # 검사한 문장이 하나도 없으면(한 단어 답변 등) 근거를 확인할 수 없으므로 불일치로 처리
+    grounded = bool(evidence) and all(e["grounded"] for e in evidence)
+    return {"verification": "일치함" if grounded else "불일치함", "verification_evidence": evidence}
+
@@ -0,0 +1,9 @@
+# conftest.py
+
+import os
+import sys
+
+# src/ 모듈과 scripts 패키지를 그래프 서버와 같은 방식으로 임포트
+# (tests/의 graph.py, nodes.py 등 실험용 스크립트보다 src/를 먼저 찾도록 앞에 추가)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), ROOT]
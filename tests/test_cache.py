@@ -0,0 +1,82 @@
+# test_cache.py
+
+import json
+
+import numpy as np
+import pytest
+
+import cache
+from cache import AnswerCache, SemanticAnswerCache, normalize_question
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def test_normalized_questions_share_an_entry():
+    assert normalize_question("복지 포인트 안내?") == normalize_question("복지포인트  안내")
+    answers = AnswerCache()
+    answers.put("복지 포인트 안내?", {"final_answer": "A"})
+    assert answers.get("복지포인트 안내") == {"final_answer": "A"}
+    assert answers.get("?!") is None
+
+
+def test_entries_expire_after_ttl(clock):
+    answers = AnswerCache(ttl=10)
+    answers.put("연차 안내", {"final_answer": "A"})
+    clock.now += 10
+    assert answers.get("연차 안내") is not None
+    clock.now += 1
+    assert answers.get("연차 안내") is None
+    assert answers.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    answers = AnswerCache(maxsize=2)
+    answers.put("연차 안내", {"final_answer": "A"})
+    answers.put("병가 안내", {"final_answer": "B"})
+    answers.get("연차 안내")  # 연차가 최근 사용 -> 병가가 제거 대상
+    answers.put("재택 안내", {"final_answer": "C"})
+    assert answers.get("병가 안내") is None
+    assert answers.get("연차 안내") == {"final_answer": "A"}
+    assert answers.get("재택 안내") == {"final_answer": "C"}
+
+
+def test_stats_and_discard():
+    answers = AnswerCache()
+    answers.put("연차 안내", {"final_answer": "A"})
+    answers.get("연차 안내")
+    answers.discard("연차 안내")
+    answers.get("연차 안내")
+    stats = answers.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 0)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_semantic_cache_round_trips_through_npy_and_json(tmp_path):
+    path = str(tmp_path / "semantic.json")
+    saved = SemanticAnswerCache(path=path)
+    saved._remember(normalize_question("연차 안내"), [1.0, 0.0])
+    saved.put("연차 안내", {"final_answer": "A", "retrieved_docs": []})
+    saved.flush()
+
+    loaded = SemanticAnswerCache(path=path)
+    assert loaded.stats()["size"] == 1
+    assert loaded._match(np.asarray([1.0, 0.0], dtype=np.float32))["final_answer"] == "A"
+
+
+def test_semantic_cache_ignores_json_without_matching_npy(tmp_path):
+    path = tmp_path / "semantic.json"
+    path.write_text(json.dumps({"entries": [{"question": "연차 안내", "created": 0, "last_used": 0, "value": {}}]}))
+    assert SemanticAnswerCache(path=str(path)).stats()["size"] == 0
@@ -0,0 +1,44 @@
+# test_context.py
+
+from langchain_core.documents import Document
+
+from context import assemble_docs, build_context
+
+META = {"source": "04_복지정책_v1.0.md", "doc_title": "복지제도 안내서", "main_category": "1. 휴가 및 휴직 제도"}
+FIRST = "연차휴가는 입사 1년 후 15일이 부여됩니다. 사용하지 않은 연차는 다음 해로 이월되지 않습니다."
+SECOND = "사용하지 않은 연차는 다음 해로 이월되지 않습니다. 미사용 연차는 수당으로 보상합니다."
+
+
+def _doc(text, **metadata):
+    return Document(page_content=text, metadata={**META, **metadata})
+
+
+def test_overlapping_chunks_are_merged_once():
+    passages = assemble_docs([_doc(SECOND), _doc(FIRST)])
+    assert len(passages) == 1
+    text = passages[0].page_content
+    assert text.startswith("연차휴가는") and text.endswith("보상합니다.")
+    assert text.count("이월되지 않습니다.") == 1
+
+
+def test_contained_chunk_is_dropped():
+    passages = assemble_docs([_doc(FIRST), _doc("입사 1년 후 15일이 부여됩니다.")])
+    assert [p.page_content for p in passages] == [FIRST]
+
+
+def test_short_overlap_is_not_merged():
+    passages = assemble_docs([_doc(FIRST), _doc("않습니다. 병가는 별도입니다.")], min_overlap=20)
+    assert len(passages) == 2
+
+
+def test_chunks_under_other_headers_stay_separate_and_ordered():
+    other = _doc(SECOND, main_category="2. 복지 포인트")
+    passages = assemble_docs([other, _doc(FIRST), _doc(SECOND)])
+    assert passages[0] is other
+    assert passages[1].page_content.endswith("보상합니다.")
+
+
+def test_build_context_numbers_sources():
+    context = build_context([_doc(FIRST), Document(page_content="본문")])
+    assert context.startswith("[1] (04_복지정책_v1.0.md)\n" + FIRST)
+    assert "[2] (unknown)\n본문" in context
@@ -0,0 +1,61 @@
+# test_fast_router.py
+
+import pytest
+
+import fast_router
+
+# 빠른 라우터가 LLM 없이 잘못 확정했던 질문 (질문, 기대 classify_hr, 기대 classify_route)
+# None은 "규칙으로 확정하지 않고 LLM 라우터에 맡김"
+REGRESSION_CASES = [
+    ("점심 메뉴 추천 안내", None, None),
+    ("주식 투자 방법 안내", None, None),
+    ("김철수 직원 연락처 안내", None, None),
+    ("내 휴가 승인 좀 해줘", None, None),
+    ("육아휴직 중 급여 계산해줘", None, None),
+    ("제 연차 며칠 남았어?", None, None),
+    ("서버 비용 처리 규정 안내", None, None),
+    ("연차 사용 기준 안내", True, {"route": "rag"}),
+]
+
+
+@pytest.mark.parametrize("question, expected_hr, expected_route", REGRESSION_CASES)
+def test_regression_cases(question, expected_hr, expected_route):
+    assert fast_router.classify_hr(question, question) is expected_hr
+    assert fast_router.classify_route(question) == expected_route
+
+
+def test_keywords_match_regardless_of_spacing():
+    assert fast_router.classify_route("시차출근 제도 안내") == {"route": "rag"}
+    assert fast_router.classify_route("복지포인트 사용처 안내") == {"route": "rag"}
+    assert fast_router.classify_route("vpn 접속이 안 돼요") == {"route": "department", "department": "인프라"}
+
+
+def test_single_department_without_hr_wording():
+    assert fast_router.classify_route("택배 발송 방법 안내") == {"route": "department", "department": "총무"}
+    assert fast_router.classify_route("랜섬웨어 감염 신고 안내") == {"route": "department", "department": "보안"}
+
+
+@pytest.mark.parametrize("question", [
+    "숙박비 지급 기준 안내",      # 부서 키워드 + 규정 표현
+    "재택 근무 중 VPN 접속 안내",  # 부서 키워드 + HR 주제
+    "법인 차량 세금 안내",        # 여러 부서 키워드 (총무, 재무)
+    "서버 사용 안내",             # 단독으로는 뜻이 넓은 단어
+])
+def test_ambiguous_routes_go_to_llm(question):
+    assert fast_router.classify_route(question) is None
+
+
+def test_non_hr_signals():
+    assert fast_router.classify_hr("올해 매출 얼마야?", "회사 매출 안내") is False
+    assert fast_router.classify_hr("주민번호 900101-1234567 확인해줘", "invalid_input") is False
+    # 비HR 신호와 HR 주제가 함께 있으면 LLM 판단
+    assert fast_router.classify_hr("병가 소송", "병가 관련 소송 안내") is None
+
+
+def test_stats_count_fast_and_llm_paths():
+    before = fast_router.get_fast_router_stats()
+    fast_router.classify_route("연차 사용 기준 안내")
+    fast_router.classify_route("점심 메뉴 추천 안내")
+    after = fast_router.get_fast_router_stats()
+    assert after["route_fast_rag"] == before["route_fast_rag"] + 1
+    assert after["route_llm"] == before["route_llm"] + 1
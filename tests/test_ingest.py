@@ -0,0 +1,50 @@
+# test_ingest.py
+
+import httpx
+import openai
+import pytest
+
+from scripts.create_pinecone_index import _is_retryable, _with_backoff
+
+
+def _openai_error(cls, status):
+    response = httpx.Response(status, request=httpx.Request("POST", "https://api.openai.com/v1/embeddings"))
+    return cls("error", response=response, body=None)
+
+
+class _StatusError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+@pytest.mark.parametrize("error", [
+    _openai_error(openai.RateLimitError, 429),
+    _openai_error(openai.InternalServerError, 503),
+    _StatusError(429),
+    _StatusError(502),
+])
+def test_rate_limits_and_server_errors_are_retried(error):
+    assert _is_retryable(error)
+
+
+@pytest.mark.parametrize("error", [
+    _openai_error(openai.BadRequestError, 400),
+    _StatusError(404),
+    ValueError("chunk 429 is invalid"),
+    RuntimeError("rate limit exceeded"),
+])
+def test_errors_are_not_classified_by_message(error):
+    assert not _is_retryable(error)
+
+
+def test_backoff_stops_on_non_retryable_error():
+    calls = []
+
+    def _fail():
+        calls.append(1)
+        raise ValueError("429")
+
+    with pytest.raises(ValueError):
+        _with_backoff(_fail)
+    assert len(calls) == 1
@@ -0,0 +1,42 @@
+# test_lexical.py
+
+from lexical import BM25Index, char_ngrams
+
+DOCS = [
+    "연차휴가는 입사 1년 후 15일이 부여됩니다.",
+    "병가는 연간 최대 60일까지 사용할 수 있습니다.",
+    "가족돌봄휴가는 연간 10일 이내로 사용합니다.",
+]
+
+
+def test_char_ngrams_splits_words_into_bigrams():
+    assert char_ngrams("병가를 신청") == ["병가", "가를", "신청"]
+    assert char_ngrams("VPN 연차", n=3) == ["vpn", "연차"]
+    assert char_ngrams("") == []
+
+
+def test_term_with_particle_matches_its_document():
+    index = BM25Index(DOCS)
+    assert index.top_k("병가를 쓰려면?", k=1)[0][0] == 1
+    assert index.top_k("가족돌봄휴가 일수", k=1)[0][0] == 2
+
+
+def test_top_k_drops_zero_scores():
+    index = BM25Index(DOCS)
+    assert len(index) == 3
+    assert index.top_k("재택근무", k=3) == []
+    assert all(score > 0 for _, score in index.top_k("휴가", k=3))
+
+
+def test_rare_terms_weigh_more():
+    index = BM25Index(DOCS)
+    scores = index.scores("연간 병가")
+    # "연간"은 두 문서에, "병가"는 한 문서에만 있음
+    assert scores[1] > scores[2] > 0
+    assert scores[0] == 0
+
+
+def test_empty_index():
+    index = BM25Index([])
+    assert index.scores("연차") == []
+    assert index.top_k("연차", k=3) == []
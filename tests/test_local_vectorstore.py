@@ -0,0 +1,36 @@
+# test_local_vectorstore.py
+
+import os
+
+import pytest
+from langchain_core.embeddings import FakeEmbeddings
+
+from scripts.local_vectorstore import STORE_FILE, LocalVectorStore
+
+
+def _store(path):
+    return LocalVectorStore(FakeEmbeddings(size=2), str(path))
+
+
+def test_new_directory_starts_empty(tmp_path):
+    assert len(_store(tmp_path / "index")) == 0
+
+
+def test_upsert_and_reload_through_store_pointer(tmp_path):
+    store = _store(tmp_path)
+    store.add_embeddings(["연차", "병가"], [[1.0, 0.0], [0.0, 1.0]], [{"source": "a"}, {"source": "b"}], ids=["a", "b"])
+    store.add_embeddings(["연차 수정"], [[1.0, 0.1]], ids=["a"])
+
+    reloaded = _store(tmp_path)
+    assert sorted(reloaded.ids) == ["a", "b"]
+    assert reloaded.get_by_ids(["a"])[0].page_content == "연차 수정"
+    results = reloaded.similarity_search_with_score_by_vector([0.0, 1.0], k=1, filter={"source": "b"})
+    assert results[0][0].id == "b"
+
+
+def test_data_files_without_store_pointer_are_an_error(tmp_path):
+    store = _store(tmp_path)
+    store.add_embeddings(["연차"], [[1.0, 0.0]], ids=["a"])
+    os.remove(tmp_path / STORE_FILE)
+    with pytest.raises(RuntimeError, match=STORE_FILE):
+        _store(tmp_path)
@@ -0,0 +1,33 @@
+# test_rerankers.py
+
+from langchain_core.documents import Document
+
+from rerankers import _batch_scores, order_by_scores, score_lexical
+
+
+def _docs(*texts):
+    return [Document(page_content=t) for t in texts]
+
+
+def test_batch_scores_leave_missing_candidates_unscored():
+    result = {"scores": [{"index": 2, "score": 0.9}, {"index": 0, "score": 1.5}, {"index": 7, "score": 0.3}]}
+    assert _batch_scores(result, 3) == [1.0, None, 0.9]
+
+
+def test_unscored_documents_keep_their_vector_rank():
+    docs = _docs("a", "b", "c", "d")
+    ranked = order_by_scores(docs, [0.2, None, 0.9, 0.5])
+    assert [d.page_content for d in ranked] == ["c", "b", "d", "a"]
+
+
+def test_partial_batch_degrades_like_a_timeout():
+    docs = _docs("a", "b", "c")
+    partial = _batch_scores({"scores": [{"index": 2, "score": 0.9}]}, 3)
+    assert order_by_scores(docs, partial) == order_by_scores(docs, [None, None, 0.9])
+    assert [d.page_content for d in order_by_scores(docs, partial)] == ["a", "b", "c"]
+
+
+def test_lexical_scores_are_normalized_to_the_best_match():
+    scores = score_lexical("병가 신청", _docs("병가는 신청서를 제출합니다.", "연차휴가 안내", ""))
+    assert scores[0] == 1.0
+    assert scores[1] == scores[2] == 0.0
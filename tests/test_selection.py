@@ -0,0 +1,59 @@
+# test_selection.py
+
+import pytest
+from langchain_core.documents import Document
+
+import selection
+
+BASE = "연차휴가는 입사 1년 후 15일이 부여되며, 사용하지 않은 연차는 다음 해로 이월되지 않습니다."
+
+
+@pytest.fixture(autouse=True)
+def _char_tokens(monkeypatch):
+    # tiktoken 인코딩 파일 없이도 결과가 같도록 글자 수를 토큰 수로 사용
+    monkeypatch.setattr(selection, "count_tokens", len)
+    for name in ("CONTEXT_MIN_SCORE", "CONTEXT_MMR_LAMBDA", "CONTEXT_DUP_THRESHOLD", "CONTEXT_TOKEN_BUDGET"):
+        monkeypatch.delenv(name, raising=False)
+
+
+def _docs(*texts):
+    return [Document(page_content=t) for t in texts]
+
+
+def test_near_duplicate_chunk_is_dropped():
+    docs = _docs(BASE, BASE + " 참고하세요.", "병가는 연간 최대 60일까지 사용할 수 있습니다.")
+    selected = selection.select_docs(docs, [0.9, 0.85, 0.5], budget=1000)
+    assert [d.page_content for d in selected] == [docs[0].page_content, docs[2].page_content]
+
+
+def test_duplicate_threshold_is_configurable(monkeypatch):
+    monkeypatch.setenv("CONTEXT_DUP_THRESHOLD", "1.01")
+    docs = _docs(BASE, BASE + " 참고하세요.")
+    assert len(selection.select_docs(docs, [0.9, 0.85], budget=1000)) == 2
+
+
+def test_mmr_prefers_novel_chunk_over_redundant_one(monkeypatch):
+    monkeypatch.setenv("CONTEXT_MMR_LAMBDA", "0.5")
+    monkeypatch.setenv("CONTEXT_DUP_THRESHOLD", "1.01")
+    novel = "병가는 연간 최대 60일까지 사용할 수 있습니다."
+    docs = _docs(BASE, BASE + " 참고하세요.", novel)
+    selected = selection.select_docs(docs, [0.9, 0.8, 0.7], budget=1000)
+    assert [d.page_content for d in selected][:2] == [BASE, novel]
+
+
+def test_low_scores_are_dropped_but_best_is_kept():
+    docs = _docs("연차 규정", "병가 규정", "재택 규정")
+    assert [d.page_content for d in selection.select_docs(docs, [0.9, 0.1, None], budget=1000)] == ["연차 규정", "재택 규정"]
+    assert [d.page_content for d in selection.select_docs(docs, [0.1, 0.2, 0.05], budget=1000)] == ["병가 규정"]
+
+
+def test_budget_skips_long_chunk_and_keeps_shorter_ones():
+    docs = _docs("가" * 50, "나" * 80, "다" * 30)
+    selected = selection.select_docs(docs, [0.9, 0.8, 0.7], budget=100)
+    assert [len(d.page_content) for d in selected] == [50, 30]
+
+
+def test_first_chunk_is_kept_even_over_budget():
+    docs = _docs("가" * 200)
+    assert selection.select_docs(docs, [0.9], budget=100) == docs
+    assert selection.select_docs([], [], budget=100) == []
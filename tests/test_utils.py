@@ -0,0 +1,41 @@
+# test_utils.py
+
+import asyncio
+
+import httpx
+
+import utils
+from utils import _LoopLocalTransport
+
+
+def test_each_event_loop_gets_its_own_pool():
+    transport = _LoopLocalTransport()
+
+    async def _current():
+        return transport._current(), transport._current()
+
+    first, same = asyncio.run(_current())
+    second, _ = asyncio.run(_current())
+    assert first is same
+    assert first is not second
+    # 닫힌 루프의 풀은 새 루프의 풀을 만들 때 정리
+    assert list(transport._transports.values()) == [second]
+
+
+def test_shared_async_client_survives_repeated_asyncio_run(monkeypatch):
+    # 실제 네트워크 대신 루프별 풀 자리에 MockTransport 사용
+    pools = []
+
+    def _mock_pool(**kwargs):
+        pools.append(httpx.MockTransport(lambda request: httpx.Response(200, json={"ok": True})))
+        return pools[-1]
+
+    monkeypatch.setattr(utils.httpx, "AsyncHTTPTransport", _mock_pool)
+    client = httpx.AsyncClient(transport=_LoopLocalTransport())
+
+    async def _get():
+        return (await client.get("https://example.com")).json()
+
+    assert asyncio.run(_get()) == {"ok": True}
+    assert asyncio.run(_get()) == {"ok": True}
+    assert len(pools) == 2
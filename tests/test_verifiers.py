@@ -0,0 +1,46 @@
+# test_verifiers.py
+
+from langchain_core.documents import Document
+
+from verifiers import check_groundedness
+
+SOURCE = "연차휴가는 입사 1년 후 15일이 부여됩니다. 결혼 시 경조금 300만원을 지급합니다."
+
+
+def _check(answer, source=SOURCE):
+    return check_groundedness(answer, [Document(page_content=source)])
+
+
+def _missing(result):
+    return [n for e in result["verification_evidence"] for n in e["missing_numbers"]]
+
+
+def test_grounded_answer_with_citations():
+    result = _check("연차휴가는 입사 1년 후 15일이 부여됩니다 [1].\n\n출처 목록\n[1] 04_복지정책_v1.0.md")
+    assert result["verification"] == "일치함"
+
+
+def test_number_suffix_is_not_a_match():
+    # "5일"은 출처의 "15일"에 포함되지만 다른 수치
+    result = _check("연차휴가는 입사 1년 후 5일이 부여됩니다.")
+    assert result["verification"] == "불일치함"
+    assert _missing(result) == ["5일"]
+
+
+def test_spacing_and_thousands_separators_are_ignored():
+    assert _check("결혼 시 경조금 300 만원을 지급합니다.")["verification"] == "일치함"
+    source = "결혼 시 경조금 3000000원을 지급합니다."
+    assert _check("결혼 시 경조금 3,000,000원을 지급합니다.", source)["verification"] == "일치함"
+
+
+def test_unit_conversions_are_not_matched():
+    # 단위 환산(만원 <-> 원)은 하지 않으므로 표기가 다르면 불일치로 보수적으로 판정
+    result = _check("결혼 시 경조금 3,000,000원을 지급합니다.")
+    assert result["verification"] == "불일치함"
+    assert _missing(result) == ["3000000원"]
+
+
+def test_no_evidence_and_empty_inputs():
+    assert _check("문서에 근거가 없어 답변드리기 어렵습니다.")["verification"] == "불일치함"
+    assert _check("")["verification"] == "불일치함"
+    assert _check("연차휴가는 15일입니다.", source="  ")["verification"] == "불일치함"